@@ -0,0 +1,183 @@
+"""
+Token blacklist maintenance: expired-row purging, table statistics and the one-shot
+migration from the old full-token format.
+
+    python -m app.auth.blacklist stats
+    python -m app.auth.blacklist purge
+    python -m app.auth.blacklist migrate
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime
+
+import jwt
+from sqlalchemy import create_engine, delete, select, func, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth.model import BlacklistedToken
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+BLACKLIST_PURGE_INTERVAL_SECONDS = settings.blacklist_purge_interval_seconds
+BLACKLIST_PURGE_BATCH_SIZE = settings.blacklist_purge_batch_size
+
+
+def purge_expired(db: Session, batch_size: int = BLACKLIST_PURGE_BATCH_SIZE, max_batches: int | None = None) -> int:
+    """Deletes expired rows in bounded batches so no single statement holds locks for long."""
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        expired_ids = select(BlacklistedToken.id).where(BlacklistedToken.expires_at < datetime.utcnow()) \
+            .order_by(BlacklistedToken.expires_at).limit(batch_size)
+        result = db.execute(delete(BlacklistedToken).where(BlacklistedToken.id.in_(expired_ids)))
+        db.commit()
+        deleted += result.rowcount
+        batches += 1
+        if result.rowcount < batch_size:
+            break
+    return deleted
+
+
+def table_stats(db: Session) -> dict:
+    stats = {
+        "rows": db.query(func.count(BlacklistedToken.id)).scalar(),
+        "expired_rows": db.query(func.count(BlacklistedToken.id))
+        .filter(BlacklistedToken.expires_at < datetime.utcnow()).scalar(),
+    }
+    if db.bind.dialect.name == "postgresql":
+        stats["total_bytes"] = db.execute(
+            text("SELECT pg_total_relation_size('blacklisted_tokens')")
+        ).scalar()
+    return stats
+
+
+def migrate_legacy_rows(db: Session, batch_size: int = 1000) -> int:
+    """
+    Converts a blacklisted_tokens table that still stores the full JWT into the hashed format:
+    adds token_hash, backfills it, drops expired rows and the old columns, then builds indexes.
+    Safe to re-run.
+    """
+    columns = {column["name"] for column in inspect(db.bind).get_columns("blacklisted_tokens")}
+    if "token" not in columns:
+        return 0
+
+    if "token_hash" not in columns:
+        db.execute(text("ALTER TABLE blacklisted_tokens ADD COLUMN token_hash VARCHAR(64)"))
+        db.commit()
+
+    db.execute(text("DELETE FROM blacklisted_tokens WHERE expires_at < :now"), {"now": datetime.utcnow()})
+    db.commit()
+
+    migrated = 0
+    while True:
+        rows = db.execute(
+            text("SELECT id, token FROM blacklisted_tokens WHERE token_hash IS NULL ORDER BY id LIMIT :limit"),
+            {"limit": batch_size},
+        ).all()
+        if not rows:
+            break
+        for row_id, token in rows:
+            try:
+                jti = jwt.decode(token, options={"verify_signature": False}).get("jti")
+            except jwt.InvalidTokenError:
+                jti = None
+            key = hashlib.sha256((jti or token).encode("utf-8")).hexdigest()
+            db.execute(text("UPDATE blacklisted_tokens SET token_hash = :key WHERE id = :id"),
+                       {"key": key, "id": row_id})
+        db.commit()
+        migrated += len(rows)
+
+    # The same token may have been blacklisted twice; keep the first row
+    db.execute(text(
+        "DELETE FROM blacklisted_tokens WHERE id NOT IN "
+        "(SELECT MIN(id) FROM blacklisted_tokens GROUP BY token_hash)"
+    ))
+    for column in ("token", "jti"):
+        if column in columns:
+            if column == "jti":
+                db.execute(text("DROP INDEX IF EXISTS ix_blacklisted_tokens_jti"))
+            db.execute(text(f"ALTER TABLE blacklisted_tokens DROP COLUMN {column}"))
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("ALTER TABLE blacklisted_tokens ALTER COLUMN token_hash SET NOT NULL"))
+    db.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_blacklisted_tokens_token_hash ON blacklisted_tokens (token_hash)"
+    ))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_blacklisted_tokens_expires_at ON blacklisted_tokens (expires_at)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_blacklisted_tokens_created_at ON blacklisted_tokens (created_at)"))
+    db.commit()
+    return migrated
+
+
+class BlacklistPurger:
+    """Background task deleting expired blacklist rows every BLACKLIST_PURGE_INTERVAL_SECONDS."""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purged_total = 0
+        self.last_purged = 0
+        self.last_duration_seconds = 0.0
+        self._session_factory: sessionmaker | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def purge_once(self) -> int:
+        started = time.perf_counter()
+        with self._session_factory() as db:
+            purged = purge_expired(db, self.batch_size)
+        self.last_duration_seconds = time.perf_counter() - started
+        self.last_purged = purged
+        self.purged_total += purged
+        return purged
+
+    async def _run(self):
+        while True:
+            # Jitter keeps several workers from purging in lockstep
+            await asyncio.sleep(self.interval * random.uniform(0.8, 1.2))
+            try:
+                await asyncio.to_thread(self.purge_once)
+            except Exception:
+                logger.exception("Blacklist purge failed")
+
+
+blacklist_purger = BlacklistPurger(BLACKLIST_PURGE_INTERVAL_SECONDS, BLACKLIST_PURGE_BATCH_SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token blacklist maintenance")
+    parser.add_argument("command", choices=["stats", "purge", "migrate"])
+    parser.add_argument("--batch-size", type=int, default=BLACKLIST_PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with Session(create_engine(settings.database_url)) as db:
+        if args.command == "migrate":
+            print(f"Migrated {migrate_legacy_rows(db, args.batch_size)} rows.")
+        elif args.command == "purge":
+            started = time.perf_counter()
+            purged = purge_expired(db, args.batch_size)
+            elapsed = time.perf_counter() - started
+            rate = purged / elapsed if elapsed else 0.0
+            print(f"Purged {purged} rows in {elapsed:.2f}s ({rate:.0f} rows/s).")
+
+        for name, value in table_stats(db).items():
+            print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, Text
+from sqlalchemy import Column, Integer, DateTime, Boolean, func, String
 
 from app.database import Base
 
@@ -26,6 +26,7 @@ class BlacklistedToken(Base):
     __tablename__ = "blacklisted_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(Text, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # sha256 hex of the token's jti (or of the raw token for tokens issued without one)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.auth.model import User
+from app.settings import get_settings
+
+settings = get_settings()
+
+PRINCIPAL_CACHE_TTL_SECONDS = settings.principal_cache_ttl_seconds
+PRINCIPAL_CACHE_MAX_ENTRIES = settings.principal_cache_max_entries
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user; safe to share across requests and threads."""
+
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, first_name=user.first_name, last_name=user.last_name,
+                   is_active=user.is_active)
+
+
+class PrincipalCache:
+    """Per-process LRU of principals keyed by user id, with TTL so other workers' changes age out."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+
+    def get(self, user_id: int) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, principal: Principal):
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User):
+    # Deactivation or profile changes made through the ORM take effect on this worker immediately
+    principal_cache.invalidate(target.id)
@@ -1,45 +1,69 @@
 from fastapi import Depends, HTTPException, status, APIRouter
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.model import User
+from app.auth.principal import Principal, principal_cache
 from app.auth.schema import UserResponse, UserSignup, UserLogin, TokenResponse
-from app.auth_util import get_current_user, get_token_from_header
+from app.auth_util import get_current_user, get_verified_token, VerifiedToken
 from app.database import get_db
 from app.global_constants import SuccessMessage, ErrorMessage
-from app.jwt_utils import create_access_token, create_refresh_token, verify_access_token, blacklist_token, \
-    verify_refresh_token
-from app.security import verify_password, hash_password
+from app.jwt_utils import create_access_token, create_refresh_token, blacklist_token, verify_refresh_token
+from app.security import password_hasher, PasswordHasherBusyError
 from app.utils import get_response_schema
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 bearer_scheme = HTTPBearer()
 
+async def _hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=ErrorMessage.SERVER_BUSY.value,
+                            headers={"Retry-After": "1"})
+
 @router.post("/signup", response_model=UserResponse)
-def signup(payload: UserSignup, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == payload.email).first()
+async def signup(payload: UserSignup, db: AsyncSession = Depends(get_db)):
+    existing_user = (await db.scalars(select(User).filter(User.email == payload.email))).first()
 
     if existing_user:
         raise HTTPException(status_code=400, detail=ErrorMessage.EMAIL_ALREADY_EXISTS.value)
 
     user = User(
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await _hash_password(payload.password),
         first_name=payload.first_name,
         last_name=payload.last_name
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 # Login
 @router.post("/login", response_model=TokenResponse)
-def login(payload: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email,User.is_active == True).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_db)):
+    user = (await db.scalars(select(User).filter(User.email == payload.email,User.is_active == True))).first()
+    if not user:
+        raise HTTPException(status_code=400, detail=ErrorMessage.INVALID_CREDENTIALS.value)
+
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(payload.password, user.hashed_password)
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=ErrorMessage.SERVER_BUSY.value,
+                            headers={"Retry-After": "1"})
+    if not verified:
         raise HTTPException(status_code=400, detail=ErrorMessage.INVALID_CREDENTIALS.value)
 
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the plaintext
+        user.hashed_password = new_hash
+        await db.commit()
+
+    # The first authenticated request from this client then needs no user lookup
+    principal_cache.put(Principal.from_user(user))
+
     access_token = create_access_token(user.id)
     refresh_token = create_refresh_token(user.id)
     user_response = UserResponse.model_validate(user)
@@ -53,25 +77,23 @@ def login(payload: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/logout")
-def logout(db: Session = Depends(get_db), current_user: User = Depends(get_current_user), token: str = Depends(get_token_from_header)):
+async def logout(db: AsyncSession = Depends(get_db), verified_token: VerifiedToken = Depends(get_verified_token)):
 
-    user_id = verify_access_token(token, db)
-    if not user_id:
-        raise HTTPException(status_code=401, detail=ErrorMessage.INVALID_TOKEN.value)
-    if blacklist_token(token, db):
+    # get_verified_token already decoded the token and checked revocation for this request
+    if await blacklist_token(verified_token.token, db, verified_token.payload):
         return get_response_schema({}, SuccessMessage.LOGOUT_SUCCESS.value, status.HTTP_200_OK)
     else:
         raise HTTPException(status_code=400, detail=ErrorMessage.LOGOUT_FAILED.value)
 
 @router.post("/refresh")
-def refresh(refresh_token: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), access_token: str = Depends(get_token_from_header)):
+async def refresh(refresh_token: str, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user), verified_token: VerifiedToken = Depends(get_verified_token)):
     user_id = verify_refresh_token(refresh_token)
     if not user_id:
         raise HTTPException(status_code=401, detail=ErrorMessage.INVALID_TOKEN.value)
 
     # blacklist the old access token if it is not blacklisted
     try:
-        blacklist_token(access_token, db)
+        await blacklist_token(verified_token.token, db, verified_token.payload)
     except:
         pass
 
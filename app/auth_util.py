@@ -1,30 +1,59 @@
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.model import User
-from app.database import get_db
+from app.auth.principal import Principal, principal_cache
+from app.database import get_read_db
+from app.db_replica import FailoverSession
 from app.global_constants import ErrorMessage
-from app.jwt_utils import verify_access_token
+from app.jwt_utils import decode_access_token
 
 # Swagger will now show simple "Authorize" for Bearer token
 bearer_scheme = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),db: Session = Depends(get_db)):
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    token: str
+    payload: dict
+
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+                           db: AsyncSession = Depends(get_read_db)) -> Principal:
     token = credentials.credentials
-    user_id = verify_access_token(token,db)
-    if not user_id:
+    payload = await decode_access_token(token, db)
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-    user = db.query(User).filter(User.id == user_id,User.is_active == True).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    return user
+    # Request-scoped memo so logout/refresh reuse this check instead of decoding again
+    request.state.verified_token = VerifiedToken(token=token, payload=payload)
+
+    user_id = int(payload["sub"])
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        query = select(User).filter(User.id == user_id,User.is_active == True)
+        user = (await db.scalars(query)).first()
+        if not user and isinstance(db, FailoverSession) and db.on_replica:
+            # The account may be newer than the replica's copy of it
+            await db.switch_to_primary()
+            user = (await db.scalars(query)).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+    return principal
+
+async def get_verified_token(request: Request, current_user: Principal = Depends(get_current_user)) -> VerifiedToken:
+    return request.state.verified_token
 
 def get_token_from_header(request: Request):
     auth_header = request.headers.get("Authorization")
@@ -1,6 +1,15 @@
-from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, Text, ForeignKey, Index, text
+from sqlalchemy.dialects import sqlite
+
 from app.database import Base
 
+# SQLite's CURRENT_TIMESTAMP has no fractional part; bind datetimes the same way so a list
+# cursor compares equal to the row it came from
+_Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 
 class Blog(Base):
     __tablename__ = "blogs"
@@ -17,6 +26,14 @@ class Blog(Base):
     content = Column(Text, nullable=False)
 
     # Additional Fields
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(_Timestamp, server_default=func.now())
+    updated_at = Column(_Timestamp, server_default=func.now(), onupdate=func.now())
     is_active = Column(Boolean, default=True)
+    # Bumped by every UPDATE, including bulk ones; the ETag is built from it since updated_at
+    # can repeat within a second
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=text("version + 1"))
+
+    __table_args__ = (
+        # Serves the per-user list in its sort order, including keyset page seeks
+        Index("ix_blogs_user_id_updated_at_id", user_id, updated_at.desc(), id.desc()),
+    )
@@ -1,59 +1,299 @@
-from fastapi import APIRouter, Depends,status
-from sqlalchemy.orm import Session
+from datetime import datetime
 
-from app.auth.model import User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.principal import Principal
 from app.auth_util import get_current_user
 from app.blog.model import Blog
-from app.blog.schema import BlogCreate, BlogResponse, BlogUpdate
-from app.database import get_db
+from app.blog.schema import BlogBulkCreate, BlogBulkDelete, BlogBulkUpdate, BlogCreate, BlogListPage, \
+    BlogResponse, BlogSearchPage, BlogUpdate
+from app.blog.search import search_blogs
+from app.blog.transfer import ImportInProgressError, export_ndjson, import_ndjson, import_tracker
+from app.database import get_db, get_read_db
 from app.global_constants import SuccessMessage, ErrorMessage
-from app.utils import get_response_schema
+from app.scrape.metadata import extract_urls, link_previewer
+from app.scrape.routes import link_list_adapter
+from app.scrape.schema import LinkMetadataList
+from app.settings import get_settings
+from app.utils import get_response_schema, encode_cursor, decode_cursor, make_etag, etag_matches, has_validators, \
+    is_not_modified, not_modified_response, validator_headers
+
+settings = get_settings()
+
+BLOG_PAGE_DEFAULT_SIZE = settings.blog_page_default_size
+BLOG_PAGE_MAX_SIZE = settings.blog_page_max_size
+BLOG_EXCERPT_CHARS = settings.blog_excerpt_chars
+SEARCH_QUERY_MAX_CHARS = settings.search_query_max_chars
+BLOG_BULK_MAX_ITEMS = settings.blog_bulk_max_items
 
 router = APIRouter(prefix="/blogs", tags=["Blogs"])
 
+# Built once at import; each response validates straight from the ORM object or row
+blog_adapter = TypeAdapter(BlogResponse)
+blog_page_adapter = TypeAdapter(BlogListPage)
+search_page_adapter = TypeAdapter(BlogSearchPage)
+
+
+def blog_etag(blog_id: int, version: int) -> str:
+    return make_etag("blog", blog_id, version)
+
+
+def blog_page_etag(rows, limit: int) -> str:
+    """
+    One page of the list is fully described by the (id, version) of its rows plus the
+    look-ahead row that decides `next_cursor`; any edit, insert or delete inside it changes the tag.
+    """
+    return make_etag("blog-list", limit, BLOG_EXCERPT_CHARS, *(f"{row.id}@{row.version}" for row in rows))
+
 @router.post("/blog")
-def create_blog(blog: BlogCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_blog(blog: BlogCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     new_blog = Blog(title=blog.title, content=blog.content, user_id=current_user.id)
     db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog)
-    return get_response_schema(new_blog, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
+    await db.commit()
+    await db.refresh(new_blog)
+    link_previewer.enrich(new_blog.content)
+    return get_response_schema(new_blog, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED,
+                               adapter=blog_adapter, headers=validator_headers(blog_etag(new_blog.id, new_blog.version), new_blog.updated_at))
+
+
+def blog_page_query(user_id: int, limit: int, after: tuple[datetime, int] | None = None, keys_only: bool = False):
+    """
+    Newest first, seeking past `after` (updated_at, id); the list carries an excerpt, not the full
+    content. `keys_only` selects just the (id, updated_at) the (user_id, updated_at, id) index holds
+    and the version, enough to compute the page's ETag.
+    """
+    columns = (Blog.id, Blog.updated_at, Blog.version) if keys_only else (
+        Blog.id, Blog.title, func.substr(Blog.content, 1, BLOG_EXCERPT_CHARS).label("excerpt"),
+        Blog.created_at, Blog.updated_at, Blog.version,
+    )
+    query = select(*columns).filter(Blog.user_id == user_id).order_by(Blog.updated_at.desc(), Blog.id.desc()).limit(limit)
+    if after is not None:
+        query = query.filter(tuple_(Blog.updated_at, Blog.id) < after)
+    return query
 
 
-@router.get("/blog-list", response_model=list[BlogResponse])
-def get_blogs(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    blog_list = db.query(Blog).filter(Blog.user_id == current_user.id).order_by(Blog.updated_at.desc()).all()
-    return get_response_schema(blog_list, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+@router.get("/blog-list", response_model=BlogListPage)
+async def get_blogs(request: Request, cursor: str | None = None, limit: int = Query(BLOG_PAGE_DEFAULT_SIZE, ge=1, le=BLOG_PAGE_MAX_SIZE),
+                    db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    after = None
+    if cursor:
+        try:
+            updated_at, last_id = decode_cursor(cursor)
+            after = (datetime.fromisoformat(updated_at), int(last_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ErrorMessage.INVALID_CURSOR.value)
+
+    if has_validators(request):
+        # Revalidation reads only index keys; the content is loaded only if the page changed
+        keys = (await db.execute(blog_page_query(current_user.id, limit + 1, after, keys_only=True))).all()
+        etag = blog_page_etag(keys, limit)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+    rows = (await db.execute(blog_page_query(current_user.id, limit + 1, after))).all()
+    etag = blog_page_etag(rows, limit)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+
+    return_data = {"items": rows, "next_cursor": next_cursor}
+    return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK,
+                               adapter=blog_page_adapter, headers=validator_headers(etag))
+
+
+@router.get("/search", response_model=BlogSearchPage)
+async def search(request: Request, q: str = Query(..., min_length=1, max_length=SEARCH_QUERY_MAX_CHARS),
+                 cursor: str | None = None, limit: int = Query(BLOG_PAGE_DEFAULT_SIZE, ge=1, le=BLOG_PAGE_MAX_SIZE),
+                 db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    after = None
+    if cursor:
+        try:
+            rank, last_id = decode_cursor(cursor)
+            after = (float(rank), int(last_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ErrorMessage.INVALID_CURSOR.value)
+
+    items = await search_blogs(db, request.app.state.database.dialect, request.app.state.search_index, current_user.id,
+                               q, limit + 1, after)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["rank"], items[-1]["id"])
+
+    return_data = {"items": items, "next_cursor": next_cursor}
+    return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK,
+                               adapter=search_page_adapter)
 
 
 @router.get("/blog/{id}")
-def get_blog(id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_blog(id: int, request: Request, db: AsyncSession = Depends(get_read_db),
+                   current_user: Principal = Depends(get_current_user)):
+    if has_validators(request):
+        validators = (await db.execute(
+            select(Blog.version, Blog.updated_at).filter(Blog.id == id, Blog.user_id == current_user.id)
+        )).first()
+        if validators is not None:
+            etag = blog_etag(id, validators.version)
+            if is_not_modified(request, etag, validators.updated_at):
+                return not_modified_response(etag, validators.updated_at)
 
-    blog_record = db.query(Blog).filter(Blog.id == id, Blog.user_id == current_user.id).first()
+    blog_record = (await db.scalars(select(Blog).filter(Blog.id == id, Blog.user_id == current_user.id))).first()
     if not blog_record:
         return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
 
-    return get_response_schema(blog_record, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+    return get_response_schema(blog_record, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK,
+                               adapter=blog_adapter, headers=validator_headers(blog_etag(blog_record.id, blog_record.version),
+                                                         blog_record.updated_at))
+
+@router.get("/blog/{id}/links", response_model=LinkMetadataList)
+async def get_blog_links(id: int, db: AsyncSession = Depends(get_read_db),
+                         current_user: Principal = Depends(get_current_user)):
+    """Preview metadata for the links in the blog's content; usually already cached by the save."""
+    content = await db.scalar(select(Blog.content).filter(Blog.id == id, Blog.user_id == current_user.id))
+    if content is None:
+        return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+    items = await link_previewer.lookup_many(extract_urls(content))
+    return get_response_schema({"items": items}, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK,
+                               adapter=link_list_adapter)
 
 @router.put("/blog/{id}")
-def update_blog(id: int, blog: BlogUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    blog_record = db.query(Blog).filter(Blog.id == id, Blog.user_id == current_user.id).first()
+async def update_blog(id: int, blog: BlogUpdate, request: Request, db: AsyncSession = Depends(get_db),
+                      current_user: Principal = Depends(get_current_user)):
+    if_match = request.headers.get("if-match")
+    query = select(Blog).filter(Blog.id == id, Blog.user_id == current_user.id)
+    if if_match is not None:
+        # Lock the row until commit so no other write lands between the check and ours
+        query = query.with_for_update()
+    blog_record = (await db.scalars(query)).first()
     if not blog_record:
         return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+    if if_match is not None and not etag_matches(if_match, blog_etag(blog_record.id, blog_record.version)):
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=ErrorMessage.PRECONDITION_FAILED.value)
 
     blog_record.title = blog.title
     blog_record.content = blog.content
     db.add(blog_record)
-    db.commit()
-    db.refresh(blog_record)
-    return get_response_schema(blog_record, SuccessMessage.RECORD_UPDATED.value, status.HTTP_200_OK)
+    await db.commit()
+    await db.refresh(blog_record)
+    link_previewer.enrich(blog_record.content)
+    return get_response_schema(blog_record, SuccessMessage.RECORD_UPDATED.value, status.HTTP_200_OK,
+                               adapter=blog_adapter, headers=validator_headers(blog_etag(blog_record.id, blog_record.version),
+                                                         blog_record.updated_at))
 
 
 @router.delete("/blog/{id}")
-def delete_blog(id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    blog_record = db.query(Blog).filter(Blog.id == id, Blog.user_id == current_user.id).first()
+async def delete_blog(id: int, request: Request, db: AsyncSession = Depends(get_db),
+                      current_user: Principal = Depends(get_current_user)):
+    blog_record = (await db.scalars(select(Blog).filter(Blog.id == id, Blog.user_id == current_user.id))).first()
     if not blog_record:
         return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
-    db.delete(blog_record)
-    db.commit()
-    return get_response_schema({}, SuccessMessage.RECORD_DELETED.value, status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    await db.delete(blog_record)
+    await db.commit()
+    request.app.state.search_index.remove(id)
+    return get_response_schema({}, SuccessMessage.RECORD_DELETED.value, status.HTTP_204_NO_CONTENT)
+
+
+def _check_bulk_size(count: int):
+    if count > BLOG_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=ErrorMessage.BULK_LIMIT_EXCEEDED.value)
+
+
+@router.post("/bulk")
+async def bulk_create_blogs(payload: BlogBulkCreate, db: AsyncSession = Depends(get_db),
+                            current_user: Principal = Depends(get_current_user)):
+    _check_bulk_size(len(payload.items))
+    # One multi-row INSERT ... RETURNING, rows back in request order
+    rows = (await db.execute(
+        insert(Blog).returning(Blog.id, Blog.created_at, sort_by_parameter_order=True),
+        [{"title": item.title, "content": item.content, "user_id": current_user.id} for item in payload.items],
+    )).all()
+    await db.commit()
+    link_previewer.enrich("\n".join(item.content for item in payload.items))
+
+    items = [{"id": row.id, "status": status.HTTP_201_CREATED, "created_at": row.created_at} for row in rows]
+    return get_response_schema({"items": items}, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
+
+
+@router.put("/bulk")
+async def bulk_update_blogs(payload: BlogBulkUpdate, db: AsyncSession = Depends(get_db),
+                            current_user: Principal = Depends(get_current_user)):
+    _check_bulk_size(len(payload.items))
+    requested_ids = [item.id for item in payload.items]
+    titles = {item.id: item.title for item in payload.items}
+    contents = {item.id: item.content for item in payload.items}
+    # One UPDATE with the ownership check in its WHERE; RETURNING tells which ids it changed.
+    # updated_at and version are still set by onupdate.
+    updated = set((await db.execute(
+        update(Blog)
+        .where(Blog.id.in_(requested_ids), Blog.user_id == current_user.id)
+        .values(title=case(titles, value=Blog.id), content=case(contents, value=Blog.id))
+        .returning(Blog.id)
+        .execution_options(synchronize_session=False)
+    )).scalars().all())
+    await db.commit()
+    if updated:
+        link_previewer.enrich("\n".join(contents[blog_id] for blog_id in updated))
+
+    items = [{"id": blog_id, "status": status.HTTP_200_OK if blog_id in updated else status.HTTP_404_NOT_FOUND}
+             for blog_id in requested_ids]
+    return get_response_schema({"items": items}, SuccessMessage.RECORD_UPDATED.value, status.HTTP_200_OK)
+
+
+@router.delete("/bulk")
+async def bulk_delete_blogs(payload: BlogBulkDelete, request: Request, db: AsyncSession = Depends(get_db),
+                            current_user: Principal = Depends(get_current_user)):
+    _check_bulk_size(len(payload.ids))
+    # The ownership check is part of the DELETE; RETURNING tells which ids it matched
+    deleted = set((await db.execute(
+        delete(Blog).where(Blog.id.in_(payload.ids), Blog.user_id == current_user.id).returning(Blog.id)
+    )).scalars().all())
+    await db.commit()
+    for blog_id in deleted:
+        request.app.state.search_index.remove(blog_id)
+
+    items = [{"id": blog_id, "status": status.HTTP_204_NO_CONTENT if blog_id in deleted else status.HTTP_404_NOT_FOUND}
+             for blog_id in payload.ids]
+    return get_response_schema({"items": items}, SuccessMessage.RECORD_DELETED.value, status.HTTP_200_OK)
+
+
+@router.get("/export")
+async def export_blogs(request: Request, gzip: bool = False, current_user: Principal = Depends(get_current_user)):
+    database = request.app.state.database
+    use_replica = database.replica_router.use_replica(request)
+    filename = "blogs.ndjson.gz" if gzip else "blogs.ndjson"
+    return StreamingResponse(
+        export_ndjson(lambda: database.open_session(replica=use_replica), current_user.id, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import")
+async def import_blogs(request: Request, db: AsyncSession = Depends(get_db),
+                       current_user: Principal = Depends(get_current_user)):
+    # The body is read as it arrives; gzip uploads (e.g. an export with ?gzip=true) are inflated on the fly
+    content_length = request.headers.get("content-length")
+    compressed = request.headers.get("content-encoding", "").lower() == "gzip" \
+        or request.headers.get("content-type", "").split(";")[0].strip() == "application/gzip"
+    try:
+        progress = import_tracker.start(current_user.id, int(content_length) if content_length else None)
+    except ImportInProgressError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=ErrorMessage.IMPORT_IN_PROGRESS.value)
+
+    result = await import_ndjson(db, current_user.id, request.stream(), progress, compressed=compressed)
+    return get_response_schema(result, SuccessMessage.RECORD_CREATED.value, status.HTTP_201_CREATED)
+
+
+@router.get("/import/status")
+async def import_status(current_user: Principal = Depends(get_current_user)):
+    progress = import_tracker.get(current_user.id)
+    if progress is None:
+        return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+    return get_response_schema(progress, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
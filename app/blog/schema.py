@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 
 
 class BlogBase(BaseModel):
@@ -8,11 +8,14 @@ class BlogBase(BaseModel):
     content: str
 
 class BlogCreate(BlogBase):
-    pass
+    title: str = Field(max_length=255)
 
 class BlogResponse(BlogBase):
     id: int
+    user_id: int
+    is_active: bool | None
     created_at: datetime
+    updated_at: datetime | None
 
     model_config = {
         "from_attributes": True
@@ -20,4 +23,73 @@ class BlogResponse(BlogBase):
 
 
 class BlogUpdate(BlogBase):
-    pass
\ No newline at end of file
+    title: str = Field(max_length=255)
+
+
+class BlogListItem(BaseModel):
+    id: int
+    title: str
+    excerpt: str
+    created_at: datetime
+    updated_at: datetime | None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class BlogListPage(BaseModel):
+    items: list[BlogListItem]
+    next_cursor: str | None
+
+
+class BlogSearchItem(BaseModel):
+    id: int
+    title: str
+    snippet: str
+    rank: float
+    updated_at: datetime | None
+
+
+class BlogSearchPage(BaseModel):
+    items: list[BlogSearchItem]
+    next_cursor: str | None
+
+
+class BlogImportItem(BaseModel):
+    """One line of an NDJSON import; `id` and other fields an export carries are ignored."""
+    title: str = Field(max_length=255)
+    content: str
+    is_active: bool | None = True
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+class BlogBulkCreate(BaseModel):
+    items: list[BlogCreate] = Field(min_length=1)
+
+
+class BlogBulkUpdateItem(BlogUpdate):
+    id: int
+
+
+class BlogBulkUpdate(BaseModel):
+    items: list[BlogBulkUpdateItem] = Field(min_length=1)
+
+    @field_validator("items")
+    @classmethod
+    def unique_ids(cls, items: list[BlogBulkUpdateItem]) -> list[BlogBulkUpdateItem]:
+        if len({item.id for item in items}) != len(items):
+            raise ValueError("Each blog id may appear only once.")
+        return items
+
+
+class BlogBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+    @field_validator("ids")
+    @classmethod
+    def unique_ids(cls, ids: list[int]) -> list[int]:
+        if len(set(ids)) != len(ids):
+            raise ValueError("Each blog id may appear only once.")
+        return ids
@@ -0,0 +1,226 @@
+"""
+Full-text search over a user's blogs.
+
+Postgres keeps a generated, weighted `tsvector` column (title A, content B) behind a GIN index
+and ranks with `ts_rank_cd`. Other databases (SQLite test deployments) use an in-process
+inverted index with BM25 scoring, kept current by re-reading recently updated rows.
+"""
+import heapq
+import html
+import math
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, literal_column, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Engine
+
+from app.blog.model import Blog
+from app.settings import get_settings
+
+settings = get_settings()
+
+SEARCH_LANGUAGE = settings.search_language
+SEARCH_SNIPPET_WORDS = settings.search_snippet_words
+
+# Snippets are HTML: the content in them is escaped, only these tags are markup
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+
+search_vector = literal_column("blogs.search_vector", type_=TSVECTOR)
+
+
+def ensure_search_schema(bind: Engine):
+    """Adds the generated tsvector column and its GIN index on Postgres; a no-op elsewhere."""
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as connection:
+        connection.execute(text(
+            "ALTER TABLE blogs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(content, '')), 'B')) STORED"
+        ))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_blogs_search_vector ON blogs USING GIN (search_vector)"))
+
+
+def _escape_html(column):
+    """SQL-side `html.escape(..., quote=False)`; entities are skipped by the text search parser."""
+    return func.replace(func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+
+async def _search_postgres(db, user_id: int, q: str, limit: int, after: tuple[float, int] | None) -> list[dict]:
+    ts_query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+    rank = func.ts_rank_cd(search_vector, ts_query)
+    headline_options = (f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+                        f"MaxWords={SEARCH_SNIPPET_WORDS}, MinWords={SEARCH_SNIPPET_WORDS // 2}, MaxFragments=2")
+    query = select(
+        Blog.id, Blog.title, Blog.updated_at, rank.label("rank"),
+        # Postgres evaluates this costly expression only for the rows that survive the LIMIT
+        func.ts_headline(SEARCH_LANGUAGE, _escape_html(Blog.content), ts_query, headline_options).label("snippet"),
+    ).where(Blog.user_id == user_id, search_vector.op("@@")(ts_query)) \
+        .order_by(rank.desc(), Blog.id.desc()).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(rank, Blog.id) < after)
+    return [row._asdict() for row in (await db.execute(query)).all()]
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text_value: str) -> list[str]:
+    return [token for token in _TOKEN_RE.findall(text_value.lower()) if token not in _STOPWORDS]
+
+
+def highlight(content: str, terms: set[str], words: int = SEARCH_SNIPPET_WORDS) -> str:
+    """A window of `words` words around the first matching term, HTML-escaped, with matches wrapped in <mark>."""
+    parts = content.split()
+    normalized = [" ".join(tokenize(part)) for part in parts]
+    first = next((i for i, part in enumerate(normalized) if part and set(part.split()) & terms), 0)
+    start = max(0, first - words // 3)
+    window = parts[start:start + words]
+    marked = [
+        f"{HIGHLIGHT_START}{part}{HIGHLIGHT_STOP}" if set(normalized[start + i].split()) & terms else part
+        for i, part in enumerate(html.escape(part, quote=False) for part in window)
+    ]
+    return ("… " if start else "") + " ".join(marked) + (" …" if start + words < len(parts) else "")
+
+
+class _UserIndex:
+    def __init__(self):
+        self.postings: dict[str, dict[int, int]] = {}
+        self.terms: dict[int, list[str]] = {}
+        self.lengths: dict[int, int] = {}
+        self.total_length = 0
+
+
+class BlogSearchIndex:
+    """
+    Per-user inverted index (term -> {blog id: term frequency}) with BM25 ranking. Titles
+    count double. Built from the table on first use, then topped up with rows updated or added
+    (ids past the highest seen, whatever their timestamps, as imports keep theirs) since the last
+    sync. Deletes made by this worker are removed right away; others are dropped when a search
+    finds the row missing.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    title_weight = 2
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._users: dict[int, _UserIndex] = {}
+        self._owners: dict[int, int] = {}
+        self._synced_until: datetime | None = None
+        self._max_id = 0
+        self._next_sync = 0.0
+
+    def __len__(self):
+        return len(self._owners)
+
+    def add(self, blog_id: int, user_id: int, title: str, content: str):
+        self.remove(blog_id)
+        counts = Counter(tokenize(content))
+        for token in tokenize(title):
+            counts[token] += self.title_weight
+        index = self._users.setdefault(user_id, _UserIndex())
+        for token, count in counts.items():
+            index.postings.setdefault(token, {})[blog_id] = count
+        length = sum(counts.values())
+        index.terms[blog_id] = list(counts)
+        index.lengths[blog_id] = length
+        index.total_length += length
+        self._owners[blog_id] = user_id
+
+    def remove(self, blog_id: int):
+        user_id = self._owners.pop(blog_id, None)
+        if user_id is None:
+            return
+        index = self._users[user_id]
+        index.total_length -= index.lengths.pop(blog_id)
+        for token in index.terms.pop(blog_id):
+            del index.postings[token][blog_id]
+            if not index.postings[token]:
+                del index.postings[token]
+
+    async def sync(self, db):
+        if time.monotonic() < self._next_sync:
+            return
+        started = datetime.utcnow()
+        query = select(Blog.id, Blog.user_id, Blog.title, Blog.content)
+        if self._synced_until is not None:
+            # Timestamps may have second precision; re-read a little history so nothing slips through
+            query = query.where(or_(Blog.updated_at >= self._synced_until - timedelta(seconds=2),
+                                    Blog.id > self._max_id))
+        for row in (await db.execute(query)).all():
+            self.add(row.id, row.user_id, row.title, row.content)
+            self._max_id = max(self._max_id, row.id)
+        self._synced_until = started
+        self._next_sync = time.monotonic() + self.sync_interval
+
+    def rank(self, user_id: int, terms: list[str], limit: int,
+             after: tuple[float, int] | None = None) -> list[tuple[float, int]]:
+        """The best `limit` (score, blog id) pairs ranked below `after`, among blogs containing every term."""
+        index = self._users.get(user_id)
+        if index is None or not terms:
+            return []
+        postings = [index.postings.get(term) for term in dict.fromkeys(terms)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        matches = set(postings[0]).intersection(*postings[1:])
+
+        documents = len(index.lengths)
+        average_length = index.total_length / documents
+        scores = []
+        for blog_id in matches:
+            length_norm = self.k1 * (1 - self.b + self.b * index.lengths[blog_id] / average_length)
+            score = 0.0
+            for posting in postings:
+                idf = math.log(1 + (documents - len(posting) + 0.5) / (len(posting) + 0.5))
+                frequency = posting[blog_id]
+                score += idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+            if after is None or (score, blog_id) < after:
+                scores.append((score, blog_id))
+        return heapq.nlargest(limit, scores)
+
+    async def search(self, db, user_id: int, q: str, limit: int, after: tuple[float, int] | None) -> list[dict]:
+        await self.sync(db)
+        terms = tokenize(q)
+        # Rows deleted by another worker are only noticed here; drop them and rank again (scores shift
+        # with the collection, so re-rank from the same position rather than past the stale page)
+        while True:
+            page = self.rank(user_id, terms, limit, after)
+            if not page:
+                return []
+            rows = {
+                row.id: row for row in (await db.execute(
+                    select(Blog.id, Blog.title, Blog.content, Blog.updated_at)
+                    .where(Blog.id.in_([blog_id for _, blog_id in page]), Blog.user_id == user_id)
+                )).all()
+            }
+            missing = [blog_id for _, blog_id in page if blog_id not in rows]
+            if not missing:
+                break
+            for blog_id in missing:
+                self.remove(blog_id)
+        results = []
+        for score, blog_id in page:
+            row = rows[blog_id]
+            results.append({"id": row.id, "title": row.title, "updated_at": row.updated_at, "rank": score,
+                            "snippet": highlight(row.content, set(terms))})
+        return results
+
+
+async def search_blogs(db, dialect: str, index: BlogSearchIndex, user_id: int, q: str, limit: int,
+                       after: tuple[float, int] | None = None) -> list[dict]:
+    """
+    Up to `limit` of the user's blogs matching `q`, best first, after the (rank, id) of a previous
+    page. `index` is the app's fallback index, used on databases other than Postgres.
+    """
+    if dialect == "postgresql":
+        return await _search_postgres(db, user_id, q, limit, after)
+    return await index.search(db, user_id, q, limit, after)
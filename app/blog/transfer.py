@@ -0,0 +1,171 @@
+"""
+Backup and migration of a user's blogs as NDJSON, one blog per line.
+
+Exports stream from a server-side cursor a partition at a time and imports are parsed line by
+line and inserted in fixed-size batches, so memory stays flat however many blogs there are.
+"""
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from app.blog.model import Blog
+from app.blog.schema import BlogImportItem
+from app.settings import get_settings
+from app.utils import json_dumps
+
+settings = get_settings()
+
+BLOG_EXPORT_BATCH_SIZE = settings.blog_export_batch_size
+BLOG_IMPORT_BATCH_SIZE = settings.blog_import_batch_size
+BLOG_IMPORT_MAX_LINE_BYTES = settings.blog_import_max_line_bytes
+
+# Failed lines reported back in full; the rest are only counted
+IMPORT_ERROR_SAMPLE = 20
+# Most bytes one gzip step may expand to, so a small upload cannot inflate all at once
+_INFLATE_STEP = 1024 * 1024
+
+
+async def export_ndjson(open_db: Callable, user_id: int, compress: bool = False) -> AsyncIterator[bytes]:
+    """The user's blogs, oldest first, as NDJSON chunks (gzip members if `compress`)."""
+    # The session belongs to the response body, which outlives the request's dependencies
+    db = open_db()
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    try:
+        result = await db.stream(
+            select(Blog.id, Blog.title, Blog.content, Blog.is_active, Blog.created_at, Blog.updated_at)
+            .where(Blog.user_id == user_id).order_by(Blog.id)
+            .execution_options(yield_per=BLOG_EXPORT_BATCH_SIZE)
+        )
+        async for partition in result.partitions(BLOG_EXPORT_BATCH_SIZE):
+            chunk = b"".join(json_dumps(row._asdict()) + b"\n" for row in partition)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if compressor is not None:
+            yield compressor.flush()
+    finally:
+        await db.close()
+
+
+class ImportInProgressError(Exception):
+    pass
+
+
+class ImportTracker:
+    """Progress of each user's running (or last) import, readable while the upload is still going."""
+
+    def __init__(self):
+        self._imports: dict[int, dict] = {}
+
+    def start(self, user_id: int, total_bytes: int | None) -> dict:
+        current = self._imports.get(user_id)
+        if current is not None and not current["finished"]:
+            raise ImportInProgressError()
+        progress = {
+            "finished": False, "total_bytes": total_bytes, "bytes_read": 0, "lines": 0,
+            "imported": 0, "failed": 0, "errors": [], "started_at": datetime.now(timezone.utc), "elapsed_seconds": 0.0,
+        }
+        self._imports[user_id] = progress
+        return progress
+
+    def get(self, user_id: int) -> dict | None:
+        return self._imports.get(user_id)
+
+
+import_tracker = ImportTracker()
+
+
+async def _inflate(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(wbits=47)  # gzip or zlib, detected from the header
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk, _INFLATE_STEP)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, _INFLATE_STEP)
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def _record_failure(progress: dict, line_number: int, error: str):
+    progress["failed"] += 1
+    if len(progress["errors"]) < IMPORT_ERROR_SAMPLE:
+        progress["errors"].append({"line": line_number, "error": error})
+
+
+async def import_ndjson(db, user_id: int, chunks: AsyncIterator[bytes], progress: dict, compressed: bool = False) -> dict:
+    """
+    Inserts one blog per valid line, BLOG_IMPORT_BATCH_SIZE at a time, each batch in its own
+    transaction. Invalid lines are skipped and counted. Returns the final `progress`.
+    """
+    started = time.monotonic()
+    now = datetime.now(timezone.utc)
+    batch: list[dict] = []
+
+    async def counted():
+        async for chunk in chunks:
+            progress["bytes_read"] += len(chunk)
+            yield chunk
+
+    async def flush():
+        await db.execute(insert(Blog), batch)
+        await db.commit()
+        progress["imported"] += len(batch)
+        progress["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        batch.clear()
+
+    def parse(line: bytes):
+        progress["lines"] += 1
+        if not line.strip():
+            return
+        try:
+            item = BlogImportItem.model_validate_json(line)
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            _record_failure(progress, progress["lines"], f"{location}: {error['msg']}" if location else error["msg"])
+            return
+        batch.append({
+            "user_id": user_id, "title": item.title, "content": item.content, "is_active": item.is_active,
+            "created_at": item.created_at or now, "updated_at": item.updated_at or item.created_at or now,
+        })
+
+    buffer = bytearray()
+    skipping = False  # inside a line that was already rejected as too long
+    try:
+        async for data in (_inflate(counted()) if compressed else counted()):
+            buffer.extend(data)
+            start = 0
+            while (end := buffer.find(b"\n", start)) != -1:
+                if skipping:
+                    skipping = False
+                elif end - start > BLOG_IMPORT_MAX_LINE_BYTES:
+                    progress["lines"] += 1
+                    _record_failure(progress, progress["lines"], f"line longer than {BLOG_IMPORT_MAX_LINE_BYTES} bytes")
+                else:
+                    parse(bytes(buffer[start:end]))
+                    if len(batch) >= BLOG_IMPORT_BATCH_SIZE:
+                        await flush()
+                start = end + 1
+            del buffer[:start]
+
+            if len(buffer) > BLOG_IMPORT_MAX_LINE_BYTES:
+                if not skipping:
+                    progress["lines"] += 1
+                    _record_failure(progress, progress["lines"], f"line longer than {BLOG_IMPORT_MAX_LINE_BYTES} bytes")
+                    skipping = True
+                buffer.clear()
+
+        if buffer and not skipping:
+            parse(bytes(buffer))
+        if batch:
+            await flush()
+    finally:
+        progress["finished"] = True
+        progress["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return progress
@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+# app.main builds its module-level app on import; the tests build their own against a scratch file
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "blog-conditional-test-secret")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import get_settings
+
+
+@pytest.fixture
+def client():
+    with tempfile.TemporaryDirectory() as directory:
+        settings = replace(get_settings(), database_url=f"sqlite:///{directory}/blog.db", migrate_on_startup=True)
+        with TestClient(create_app(settings)) as test_client:
+            yield test_client
+
+
+@pytest.fixture
+def auth(client):
+    credentials = {"email": "reader@example.com", "password": "12345"}
+    client.post("/auth/signup", json={**credentials, "first_name": "Ada", "last_name": "Reader"})
+    response = client.post("/auth/login", json=credentials)
+    return {"Authorization": f"Bearer {response.json()['results']['access_token']}"}
+
+
+def _create_blog(client, auth) -> tuple[int, str]:
+    response = client.post("/blogs/blog", json={"title": "Caching", "content": "ETags and 304s"}, headers=auth)
+    assert response.status_code == 201
+    return response.json()["results"]["id"], response.headers["etag"]
+
+
+def test_unchanged_detail_is_not_modified(client, auth):
+    blog_id, _ = _create_blog(client, auth)
+    etag = client.get(f"/blogs/blog/{blog_id}", headers=auth).headers["etag"]
+
+    response = client.get(f"/blogs/blog/{blog_id}", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_unchanged_list_is_not_modified(client, auth):
+    _create_blog(client, auth)
+    etag = client.get("/blogs/blog-list", headers=auth).headers["etag"]
+
+    response = client.get("/blogs/blog-list", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_update_changes_detail_and_list_etags(client, auth):
+    blog_id, etag = _create_blog(client, auth)
+    list_etag = client.get("/blogs/blog-list", headers=auth).headers["etag"]
+
+    updated = client.put(f"/blogs/blog/{blog_id}", json={"title": "Caching, revised", "content": "ETags and 304s"},
+                         headers={**auth, "If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+
+    detail = client.get(f"/blogs/blog/{blog_id}", headers={**auth, "If-None-Match": etag})
+    assert detail.status_code == 200
+    assert detail.json()["results"]["title"] == "Caching, revised"
+    assert client.get("/blogs/blog-list", headers={**auth, "If-None-Match": list_etag}).status_code == 200
+
+
+def test_stale_if_match_is_rejected(client, auth):
+    blog_id, etag = _create_blog(client, auth)
+    # Both writes land within the same second, so only the version can tell them apart
+    first = client.put(f"/blogs/blog/{blog_id}", json={"title": "First", "content": "x"},
+                       headers={**auth, "If-Match": etag})
+    assert first.status_code == 200
+
+    second = client.put(f"/blogs/blog/{blog_id}", json={"title": "Second", "content": "x"},
+                        headers={**auth, "If-Match": etag})
+    assert second.status_code == 412
+    assert client.get(f"/blogs/blog/{blog_id}", headers=auth).json()["results"]["title"] == "First"
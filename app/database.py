@@ -1,26 +1,209 @@
-import os
-from dotenv import load_dotenv
+import uuid
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
 
-load_dotenv()
+from app.db_pool import pool_stats, TimedAsyncQueuePool, TimedQueuePool
+from app.db_replica import FailoverSession, ReplicaRouter
+from app.settings import Settings
 
-USER = os.getenv("USER")
-PASSWORD = os.getenv("PASSWORD")
-HOST = os.getenv("HOST")
-PORT = os.getenv("PORT")
-DBNAME = os.getenv("DBNAME")
+Base = declarative_base()
 
-DATABASE_URL = f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+def pool_options(settings: Settings, asynchronous: bool = False) -> dict:
+    return {
+        "poolclass": TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def to_async_url(url: str | URL, pooler_mode: str = "session") -> tuple[URL, dict]:
+    """The async-driver equivalent of `url`, plus connect args for options the driver won't take in the query."""
+    url = make_url(url)
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        if pooler_mode == "transaction":
+            # Server connections are shared between clients: cache no prepared statements, and give
+            # each one a unique name so it cannot collide with one another client left behind
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+
+def _create_async_engine(url: str, settings: Settings):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_url, connect_args = to_async_url(url, settings.db_pooler_mode)
+    return create_async_engine(async_url, connect_args=connect_args, **pool_options(settings, True))
+
+
+class Database:
+    """
+    The engines and session factories for one `Settings`. Building it does no I/O; `create_app`
+    keeps one on `app.state.database`, where the session dependencies below and the lifespan find it.
+    """
+
+    def __init__(self, settings: Settings):
+        self.mode = settings.db_mode
+        self.pooler_mode = settings.db_pooler_mode
+        self.engine = create_engine(settings.database_url, **pool_options(settings))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.dialect = self.engine.dialect.name
+
+        replica_url = settings.database_replica_url
+        self.replica_engine = create_engine(replica_url, **pool_options(settings)) if replica_url else None
+        self.ReplicaSessionLocal = sessionmaker(autoflush=False, bind=self.replica_engine) \
+            if self.replica_engine is not None else None
+        self.replica_router = ReplicaRouter(self.replica_engine is not None, settings.db_replica_sticky_seconds,
+                                            settings.db_replica_retry_seconds)
+
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.async_replica_engine = None
+        self.AsyncReplicaSessionLocal = None
+        if self.mode == "async":
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+
+            self.async_engine = _create_async_engine(settings.database_url, settings)
+            # Attributes stay loaded after commit: an async session cannot lazy-load them during serialization
+            self.AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+            if replica_url:
+                self.async_replica_engine = _create_async_engine(replica_url, settings)
+                self.AsyncReplicaSessionLocal = async_sessionmaker(self.async_replica_engine, autoflush=False,
+                                                                   expire_on_commit=False)
+
+    def open_session(self, replica: bool = False):
+        if self.AsyncSessionLocal is not None:
+            return (self.AsyncReplicaSessionLocal if replica else self.AsyncSessionLocal)()
+        return ThreadedSession((self.ReplicaSessionLocal if replica else self.SessionLocal)(expire_on_commit=False))
+
+    def stats(self) -> dict:
+        stats = {"mode": self.mode, "pooler_mode": self.pooler_mode, "pool": pool_stats(self.engine.pool)}
+        if self.async_engine is not None:
+            # The sync pool then only serves background jobs and maintenance
+            stats["async_pool"] = pool_stats(self.async_engine.pool)
+        if self.replica_router.enabled:
+            replica = self.async_replica_engine or self.replica_engine
+            stats["replica"] = {**self.replica_router.stats(), "pool": pool_stats(replica.pool)}
+        return stats
+
+    async def dispose(self):
+        for engine in (self.async_engine, self.async_replica_engine):
+            if engine is not None:
+                await engine.dispose()
+        for engine in (self.engine, self.replica_engine):
+            if engine is not None:
+                engine.dispose()
+
+
+class ThreadedSession:
+    """
+    A sync `Session` behind the subset of the `AsyncSession` interface the routes use. Each
+    statement runs in the threadpool, so one async code path serves both DB modes.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def _execute(self, statement, params=None, **kwargs):
+        result = self.sync_session.execute(statement, params, **kwargs)
+        # Plain and ORM DML without RETURNING have nothing to buffer (ORM bulk INSERT is not a CursorResult)
+        if not getattr(result._metadata, "returns_rows", True):
+            return result
+        # Fetch everything on the worker thread, as AsyncSession buffers its results too
+        return result.freeze()()
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self._execute, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def stream(self, statement, params=None, **kwargs):
+        # Unlike execute, leaves the rows on the (server-side, with yield_per) cursor
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return ThreadedStreamResult(result)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+class ThreadedStreamResult:
+    """The streaming part of `AsyncResult` over a sync result: each partition is fetched in the threadpool."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size: int | None = None):
+        partitions = self._result.partitions(size)
+        while partition := await run_in_threadpool(next, partitions, None):
+            yield partition
+
+    async def close(self):
+        await run_in_threadpool(self._result.close)
+
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+async def get_db(request: Request):
+    database: Database = request.app.state.database
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        # Noted up front: the response may be on its way before this dependency is closed
+        database.replica_router.note_write(request)
+    db = database.open_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+# Dependency for read-only routes: the replica when configured and safe for this client
+async def get_read_db(request: Request):
+    database: Database = request.app.state.database
+    db = FailoverSession(database.open_session, database.replica_router, database.replica_router.use_replica(request))
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
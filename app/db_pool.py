@@ -0,0 +1,77 @@
+import time
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.metrics import record_pool_wait
+
+
+class _TimedPoolMixin:
+    """Records how long checkouts wait for a free connection and how often new ones are opened."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._created_at: deque[float] = deque()
+
+    def _create_connection(self):
+        record = super()._create_connection()
+        self.connections_created += 1
+        self._created_at.append(time.monotonic())
+        return record
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            record_pool_wait(waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting on it
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts, pool.connections_created = self.checkouts, self.timeouts, self.connections_created
+        pool.wait_seconds_total, pool.wait_seconds_max = self.wait_seconds_total, self.wait_seconds_max
+        pool._created_at = self._created_at
+        return pool
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        while self._created_at and now - self._created_at[0] > 60:
+            self._created_at.popleft()
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "connections_created": self.connections_created,
+            "connections_created_last_minute": len(self._created_at),
+        }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> dict | None:
+    return pool.stats() if isinstance(pool, _TimedPoolMixin) else None
@@ -0,0 +1,142 @@
+import logging
+import math
+import time
+
+from fastapi import Request
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+
+logger = logging.getLogger(__name__)
+
+# Set after a write, holding its Unix time; reads stay on the primary while it is recent
+STICKY_COOKIE = "db_write_at"
+
+
+class ReplicaRouter:
+    """
+    Decides per request whether reads may go to the replica. A client that just wrote carries
+    a cookie with the time of the write and reads from the primary for `sticky_seconds` after it,
+    so replication lag never hides its own writes, whichever worker serves the read. A replica
+    that failed is skipped for `retry_seconds`.
+    """
+
+    def __init__(self, enabled: bool, sticky_seconds: float, retry_seconds: float):
+        self.enabled = enabled
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.failovers = 0
+
+    def _wrote_recently(self, request: Request) -> bool:
+        try:
+            written_at = float(request.cookies.get(STICKY_COOKIE, ""))
+        except ValueError:
+            return False
+        return time.time() - written_at < self.sticky_seconds
+
+    def use_replica(self, request: Request) -> bool:
+        if not self.enabled or time.monotonic() < self._down_until:
+            self.primary_reads += 1
+            return False
+
+        if self._wrote_recently(request):
+            self.sticky_reads += 1
+            return False
+
+        self.replica_reads += 1
+        return True
+
+    def note_write(self, request: Request):
+        # StickyReadsMiddleware turns this into the cookie on the response
+        if self.enabled:
+            request.state.db_written_at = time.time()
+
+    def mark_down(self, exc: Exception):
+        logger.warning("Read replica unavailable, using the primary: %s", exc)
+        self.failovers += 1
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "available": time.monotonic() >= self._down_until,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "failovers": self.failovers,
+        }
+
+
+class FailoverSession:
+    """
+    Read-only session for GET routes. Starts on the replica when the router allows it and
+    re-runs a statement on the primary if the replica cannot be reached; reads are safe to repeat.
+    """
+
+    def __init__(self, open_session, router: ReplicaRouter, use_replica: bool):
+        self._open_session = open_session
+        self._router = router
+        self.on_replica = use_replica
+        self._session = open_session(replica=use_replica)
+
+    async def _call(self, method: str, *args, **kwargs):
+        try:
+            return await getattr(self._session, method)(*args, **kwargs)
+        except (OperationalError, InterfaceError) as exc:
+            if not self.on_replica:
+                raise
+            self._router.mark_down(exc)
+
+        await self.switch_to_primary()
+        return await getattr(self._session, method)(*args, **kwargs)
+
+    async def switch_to_primary(self):
+        if not self.on_replica:
+            return
+        try:
+            await self._session.close()
+        except Exception:
+            pass
+        self._session = self._open_session(replica=False)
+        self.on_replica = False
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._call("execute", statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await self._call("scalars", statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self._call("scalar", statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._call("get", entity, ident, **kwargs)
+
+    async def close(self):
+        await self._session.close()
+
+
+class StickyReadsMiddleware:
+    """Pure ASGI middleware: sets `STICKY_COOKIE` on the response to a request that wrote (see `note_write`)."""
+
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.max_age = math.ceil(sticky_seconds)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                written_at = scope.get("state", {}).get("db_written_at")
+                if written_at is not None:
+                    cookie = f"{STICKY_COOKIE}={written_at:.3f}; Max-Age={self.max_age}; Path=/; HttpOnly; SameSite=Lax"
+                    message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
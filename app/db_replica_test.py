@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+
+# app.main builds its module-level app on import; the tests build their own against scratch files
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "db-replica-test-secret")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+import time
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db_replica import STICKY_COOKIE
+from app.main import create_app
+from app.migrations import upgrade
+from app.settings import get_settings
+
+CREDENTIALS = {"email": "reader@example.com", "password": "12345"}
+
+
+def _migrated(path: str) -> str:
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def directory():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+
+def _client(primary: str, replica: str, **overrides) -> TestClient:
+    settings = replace(get_settings(), database_url=f"sqlite:///{primary}", database_replica_url=f"sqlite:///{replica}",
+                       **overrides)
+    return TestClient(create_app(settings))
+
+
+def _login(client) -> dict:
+    client.post("/auth/signup", json={**CREDENTIALS, "first_name": "Ada", "last_name": "Reader"})
+    response = client.post("/auth/login", json=CREDENTIALS)
+    # Signing up is a write too; start the tests without its stickiness
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['results']['access_token']}"}
+
+
+def _titles(client, auth) -> list[str]:
+    response = client.get("/blogs/blog-list", headers=auth)
+    assert response.status_code == 200
+    return [item["title"] for item in response.json()["results"]["items"]]
+
+
+def _replicate_user_with_blog(primary: str, replica: str, title: str):
+    """Gives the replica the account, but a blog the primary does not have, so reads show where they went."""
+    with sqlite3.connect(replica) as connection:
+        connection.execute("ATTACH DATABASE ? AS source", (primary,))
+        connection.execute("INSERT INTO users SELECT * FROM source.users")
+        connection.execute("INSERT INTO blogs (title, content, user_id, is_active, version) "
+                           "SELECT ?, 'replica copy', id, 1, 1 FROM users", (title,))
+    connection.close()
+
+
+def test_reads_go_to_replica_until_the_client_writes(directory):
+    primary, replica = _migrated(f"{directory}/primary.db"), _migrated(f"{directory}/replica.db")
+    with _client(primary, replica) as client:
+        auth = _login(client)
+        _replicate_user_with_blog(primary, replica, "On the replica")
+        router = client.app.state.database.replica_router
+        sticky_reads = router.sticky_reads
+        assert _titles(client, auth) == ["On the replica"]
+
+        created = client.post("/blogs/blog", json={"title": "On the primary", "content": "fresh"}, headers=auth)
+        assert STICKY_COOKIE in created.cookies
+        # The client carries the cookie back, so it reads its own write
+        assert _titles(client, auth) == ["On the primary"]
+
+        client.cookies.clear()
+        assert _titles(client, auth) == ["On the replica"]
+
+        assert router.sticky_reads - sticky_reads == 1
+
+
+def test_unreachable_replica_fails_over_and_is_skipped(directory):
+    primary = _migrated(f"{directory}/primary.db")
+    # SQLite cannot open a file in a directory that does not exist
+    with _client(primary, f"{directory}/missing/replica.db", db_replica_retry_seconds=0.5) as client:
+        router = client.app.state.database.replica_router
+        auth = _login(client)
+        client.post("/blogs/blog", json={"title": "On the primary", "content": "only copy"}, headers=auth)
+        client.cookies.clear()
+
+        assert _titles(client, auth) == ["On the primary"]
+        assert router.stats()["failovers"] == 1
+        assert not router.stats()["available"]
+
+        # Within DB_REPLICA_RETRY_SECONDS the replica is not tried at all
+        primary_reads = router.primary_reads
+        assert _titles(client, auth) == ["On the primary"]
+        assert router.primary_reads == primary_reads + 1
+        assert router.stats()["failovers"] == 1
+
+        time.sleep(0.6)
+        assert _titles(client, auth) == ["On the primary"]
+        assert router.stats()["failovers"] == 2
@@ -45,4 +45,5 @@ def register_exception_handlers(app: FastAPI):
             schema=schema,
             message="Something went wrong. Please try again later.",
             status_code=exc.status_code,
+            headers=getattr(exc, "headers", None),
         )
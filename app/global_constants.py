@@ -18,10 +18,19 @@ class ErrorMessage(str, Enum):
 
     BAD_REQUEST = "Bad request."
     NOT_FOUND = "Record not found."
+    INVALID_CURSOR = "Invalid pagination cursor."
+    BULK_LIMIT_EXCEEDED = "Too many items in one bulk request."
+    TOO_MANY_URLS = "Too many URLs in one request."
+    IMPORT_IN_PROGRESS = "An import is already running for this account."
+    PRECONDITION_FAILED = "The record was changed since it was read. Fetch it again and retry."
     SOMETHING_WENT_WRONG = "Something went wrong. Please try again later."
+    SERVER_BUSY = "The server is busy. Please retry shortly."
+    SERVICE_NOT_READY = "The service is not ready to take traffic."
 
     SERVER_MISCONFIGURED = "Server configuration error: missing GROQ_API_KEY."
     ANSWER_GENERATION_FAILED = "We’re having trouble generating an answer. Please try again."
+    LLM_BUSY = "Too many suggestion requests right now. Please retry shortly."
+    DRAFT_LIMIT_REACHED = "You already have the maximum number of drafts in progress."
 
     EMAIL_ALREADY_EXISTS = "Email already exists."
     INVALID_CREDENTIALS = "Invalid credentials."
@@ -0,0 +1,75 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+
+from app.auth.principal import Principal, principal_cache
+from app.auth_util import get_current_user
+from app.global_constants import ErrorMessage, SuccessMessage
+from app.llm.cache import response_cache
+from app.llm.scheduler import llm_scheduler
+from app.llm.similarity import similarity_index
+from app.llm.topics import topic_batcher
+from app.metrics import METRICS_TOKEN, registry
+from app.migrations import LATEST_VERSION, current_version
+from app.profiler import slow_request_profiler
+from app.scrape.metadata import link_previewer
+from app.security import password_hasher
+from app.utils import get_response_schema
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+metrics_router = APIRouter(tags=["Internal"])
+health_router = APIRouter(prefix="/health", tags=["Internal"])
+
+registry.register_collector("principal_cache", principal_cache.stats)
+registry.register_collector("password_hasher", password_hasher.stats)
+registry.register_collector("llm_cache", response_cache.stats)
+registry.register_collector("llm_similarity", similarity_index.stats)
+registry.register_collector("llm_scheduler", llm_scheduler.stats)
+registry.register_collector("llm_batching", topic_batcher.stats)
+registry.register_collector("link_previews", link_previewer.stats)
+if slow_request_profiler is not None:
+    registry.register_collector("profiler", slow_request_profiler.stats)
+
+
+@router.get("/db/pool")
+def db_pool_stats(request: Request, current_user: Principal = Depends(get_current_user)):
+    stats = request.app.state.database.stats()
+    return get_response_schema(stats, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request):
+    # Scrapers have no user token; an optional shared secret keeps the endpoint private
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail=ErrorMessage.AUTHORIZATION_HEADER_MISSING_OR_INVALID.value)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@health_router.get("/live")
+def liveness():
+    # Answering at all is the signal: no dependencies are checked, so a database outage
+    # does not get every worker restarted
+    return get_response_schema({"status": "ok"}, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
+@health_router.get("/ready")
+def readiness(request: Request):
+    """200 once startup finished, the database answers and migrations are applied; 503 otherwise."""
+    state = request.app.state
+    checks = {"startup": "ok" if state.ready else "pending"}
+    try:
+        with state.database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        checks["database"] = "ok"
+        if not state.schema_current:
+            # Once current, the schema cannot fall behind without a redeploy
+            state.schema_current = current_version(state.database.engine) >= LATEST_VERSION
+        checks["schema"] = "ok" if state.schema_current else "pending migrations"
+    except Exception as exc:
+        checks["database"] = f"unavailable: {exc.__class__.__name__}"
+    if all(value == "ok" for value in checks.values()):
+        return get_response_schema(checks, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+    return get_response_schema(checks, ErrorMessage.SERVICE_NOT_READY.value, status.HTTP_503_SERVICE_UNAVAILABLE)
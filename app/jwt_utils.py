@@ -1,51 +1,75 @@
 # app/jwt_utils.py
-import os
+import hashlib
+import uuid
 
 import jwt
 from datetime import datetime, timedelta
 
-from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.model import BlacklistedToken
+from app.settings import get_settings
+from app.token_revocation import revocation_list
 
-load_dotenv()
-SECRET = os.getenv("SECRET_KEY")
+SECRET = get_settings().secret_key
 ACCESS_TOKEN_EXPIRE = 3600   # 1 hour
 REFRESH_TOKEN_EXPIRE = 7*24*3600  # 7 days
 
 def create_access_token(user_id: int):
     expire = datetime.utcnow() + timedelta(seconds=ACCESS_TOKEN_EXPIRE)
-    payload = {"sub": str(user_id), "exp": expire}
+    payload = {"sub": str(user_id), "exp": expire, "jti": uuid.uuid4().hex}
     return jwt.encode(payload, SECRET, algorithm="HS256")
 
 def create_refresh_token(user_id: int):
     expire = datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_EXPIRE)
-    payload = {"sub": str(user_id), "exp": expire}
+    payload = {"sub": str(user_id), "exp": expire, "jti": uuid.uuid4().hex}
     return jwt.encode(payload, SECRET, algorithm="HS256")
 
-def verify_access_token(token: str, db: Session):
+def token_hash(token: str, payload: dict) -> str:
+    # Fixed-width blacklist key; tokens issued before jti existed fall back to the raw token
+    return hashlib.sha256((payload.get("jti") or token).encode("utf-8")).hexdigest()
+
+async def decode_access_token(token: str, db: AsyncSession):
+    """Claims of a valid, unrevoked access token, else None."""
     try:
         payload = jwt.decode(token, SECRET, algorithms=["HS256"])
-        blacklisted = db.query(BlacklistedToken).filter_by(token=token).first()
+        key = token_hash(token, payload)
+        if revocation_list.ready:
+            blacklisted = revocation_list.is_revoked(key)
+        else:
+            # Startup load failed; stay correct at the cost of a round trip
+            blacklisted = await db.scalar(select(BlacklistedToken.id).filter_by(token_hash=key).limit(1))
         if blacklisted:
             return None
-        return int(payload.get("sub"))
+        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
-def blacklist_token(token: str, db: Session):
+async def verify_access_token(token: str, db: AsyncSession):
+    payload = await decode_access_token(token, db)
+    if not payload:
+        return None
+    return int(payload.get("sub"))
+
+async def blacklist_token(token: str, db: AsyncSession, payload: dict | None = None):
 
     try:
-        payload = jwt.decode(token, SECRET, algorithms=["HS256"])
-        exp = datetime.fromtimestamp(payload["exp"])
+        # Callers that already verified the token pass its claims to skip a second decode
+        if payload is None:
+            payload = jwt.decode(token, SECRET, algorithms=["HS256"])
+        exp = datetime.utcfromtimestamp(payload["exp"])
 
         # Save token to blacklist
-        blacklisted = BlacklistedToken(token=token, expires_at=exp)
+        key = token_hash(token, payload)
+        blacklisted = BlacklistedToken(token_hash=key, expires_at=exp)
         db.add(blacklisted)
-        db.commit()
+        await db.commit()
+
+        # Other workers pick this up on their next revocation sync
+        revocation_list.add(key, payload["exp"])
         return True
 
     except jwt.ExpiredSignatureError:
@@ -58,7 +82,7 @@ def blacklist_token(token: str, db: Session):
 
 def verify_refresh_token(token: str):
     try:
-        payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=["HS256"])
+        payload = jwt.decode(token, SECRET, algorithms=["HS256"])
         return int(payload.get("sub"))
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
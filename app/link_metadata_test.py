@@ -0,0 +1,115 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "link-metadata-test-secret")
+
+import asyncio
+
+import pytest
+import uvicorn
+
+from app.llm.cache import InMemoryCacheBackend, ResponseCache
+from app.scrape import metadata
+from app.scrape.metadata import LinkPreviewer
+
+PUBLIC_HOST = "public.test"
+HEAD = b"<html><head><title>Stub</title><meta name='description' content='A stub page.'>"
+
+
+async def _stub(scope, receive, send):
+    path = scope["path"]
+    if path == "/to-private":
+        port = scope["server"][1]
+        await send({"type": "http.response.start", "status": 302,
+                    "headers": [(b"location", f"http://localhost:{port}/page".encode())]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    if path == "/missing":
+        await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"not found"})
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/html")]})
+    # /endless never closes its <head>, so only the byte cap ends the download
+    await send({"type": "http.response.body", "body": HEAD, "more_body": True})
+    if path == "/endless":
+        for _ in range(256):
+            await send({"type": "http.response.body", "body": b"<meta name='filler'>" * 100, "more_body": True})
+    await send({"type": "http.response.body", "body": b"</head><body></body></html>"})
+
+
+async def _with_stub(check):
+    """Runs `check(previewer, base_url)` against the stub, served for PUBLIC_HOST on loopback."""
+    server = uvicorn.Server(uvicorn.Config(_stub, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    previewer = LinkPreviewer(ResponseCache(InMemoryCacheBackend(100, 1024 * 1024), 60), 4, 2, 2.0, 4096)
+    await previewer.start()
+    try:
+        await check(previewer, f"http://{PUBLIC_HOST}:{port}")
+    finally:
+        await previewer.close()
+        server.should_exit = True
+        await serving
+
+
+@pytest.fixture(autouse=True)
+def public_stub_host(monkeypatch):
+    resolve = metadata._resolve_public_host
+
+    async def resolve_stub_as_public(host: str) -> str:
+        return "127.0.0.1" if host == PUBLIC_HOST else await resolve(host)
+
+    monkeypatch.setattr(metadata, "SCRAPE_ALLOW_PRIVATE_HOSTS", False)
+    monkeypatch.setattr(metadata, "_resolve_public_host", resolve_stub_as_public)
+
+
+def test_page_metadata_is_read():
+    async def check(previewer, base_url):
+        result = await previewer.lookup(f"{base_url}/page")
+        assert result["error"] is None
+        assert result["final_url"] == f"{base_url}/page"
+        assert (result["title"], result["description"]) == ("Stub", "A stub page.")
+
+    asyncio.run(_with_stub(check))
+
+
+def test_redirect_to_private_address_is_rejected():
+    async def check(previewer, base_url):
+        result = await previewer.lookup(f"{base_url}/to-private")
+        assert result["error"] == "host is not publicly reachable"
+        assert result["title"] is None
+
+    asyncio.run(_with_stub(check))
+
+
+def test_private_address_is_rejected():
+    async def check(previewer, base_url):
+        result = await previewer.lookup("http://127.0.0.1/page")
+        assert result["error"] == "host is not publicly reachable"
+        assert previewer.bytes_read == 0
+
+    asyncio.run(_with_stub(check))
+
+
+def test_byte_cap_stops_download():
+    async def check(previewer, base_url):
+        result = await previewer.lookup(f"{base_url}/endless")
+        assert result["error"] is None
+        assert result["title"] == "Stub"
+        assert previewer.bytes_read == previewer.max_bytes
+
+    asyncio.run(_with_stub(check))
+
+
+def test_failures_are_cached():
+    async def check(previewer, base_url):
+        for _ in range(2):
+            assert (await previewer.lookup(f"{base_url}/missing"))["error"] == "HTTP 404"
+            assert (await previewer.lookup("http://" + "a" * 70_000 + ".test/"))["error"] == "invalid URL"
+        assert previewer.fetches == 2
+        assert previewer.failures == 2
+        assert previewer.cache.hits == 2
+
+    asyncio.run(_with_stub(check))
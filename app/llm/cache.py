@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+LLM_CACHE_BACKEND = settings.llm_cache_backend
+LLM_CACHE_TTL_SECONDS = settings.llm_cache_ttl_seconds
+LLM_CACHE_MAX_ENTRIES = settings.llm_cache_max_entries
+LLM_CACHE_MAX_BYTES = settings.llm_cache_max_bytes
+LLM_CACHE_REDIS_URL = settings.llm_cache_redis_url
+
+
+def normalize_keywords(keywords: list[str]) -> list[str]:
+    # Case-folded, trimmed, de-duplicated and order-insensitive
+    return sorted({keyword.strip().casefold() for keyword in keywords if keyword.strip()})
+
+
+def make_cache_key(keywords: list[str], model: str, prompt_version: str) -> str:
+    raw = json.dumps([model, prompt_version, normalize_keywords(keywords)])
+    return "llm:topics:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    async def get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU with TTL expiry, bounded by entry count and total value size."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared store so several uvicorn workers see each other's answers."""
+
+    def __init__(self, url: str):
+        # Optional dependency, only needed when LLM_CACHE_BACKEND=redis
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> str | None:
+        value = await self._redis.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class ResponseCache:
+    """Cache-aside wrapper with single-flight: concurrent misses for one key share one call."""
+
+    def __init__(self, backend: CacheBackend | None, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> str | None:
+        if self.backend is None:
+            return None
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            # A broken shared store must not take the LLM path down with it
+            logger.exception("Cache read failed")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: float | None = None):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        except Exception:
+            logger.exception("Cache write failed")
+
+    async def get_or_compute(self, key: str, compute, ttl_for=None) -> str:
+        """`ttl_for(value)`, when given, picks each value's TTL (e.g. shorter for cached failures)."""
+        if self.backend is None:
+            return await compute()
+
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            try:
+                value = await asyncio.shield(inflight)
+                self.coalesced += 1
+                return value
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading call was cancelled; take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            await self.set(key, value, ttl_for(value) if ttl_for is not None else None)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": LLM_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+def _build_backend() -> CacheBackend | None:
+    if LLM_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(LLM_CACHE_REDIS_URL)
+    if LLM_CACHE_BACKEND == "memory":
+        return InMemoryCacheBackend(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES)
+    return None
+
+
+response_cache = ResponseCache(_build_backend(), LLM_CACHE_TTL_SECONDS)
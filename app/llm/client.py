@@ -0,0 +1,120 @@
+import asyncio
+import random
+import time
+
+from app.llm.providers import build_provider, Completion, LLMProvider, LLMProviderError
+from app.metrics import llm_error_class, record_llm_call
+from app.settings import get_settings
+
+settings = get_settings()
+
+LLM_MODEL = settings.llm_model
+LLM_TIMEOUT_SECONDS = settings.llm_timeout_seconds
+LLM_MAX_RETRIES = settings.llm_max_retries
+LLM_BACKOFF_BASE_SECONDS = settings.llm_backoff_base_seconds
+LLM_BACKOFF_MAX_SECONDS = settings.llm_backoff_max_seconds
+
+
+class LLMNotConfiguredError(Exception):
+    pass
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Full jitter: spread retries uniformly so concurrent callers don't retry in lockstep
+    ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def _retry_delay(exc: LLMProviderError, attempt: int) -> float:
+    if exc.retry_after is not None:
+        return min(exc.retry_after, LLM_BACKOFF_MAX_SECONDS)
+    return _backoff_delay(attempt)
+
+
+class LLMClient:
+    """
+    App-lifetime LLM client. The configured provider owns the connection pool; this layer adds
+    per-call timeouts and bounded, jittered retries on 429/5xx and transport errors.
+    """
+
+    def __init__(self, provider: LLMProvider | None = None):
+        self._provider = provider
+
+    @property
+    def is_configured(self) -> bool:
+        return self._provider is not None
+
+    @property
+    def provider(self) -> LLMProvider | None:
+        return self._provider
+
+    async def start(self):
+        if self._provider is None:
+            self._provider = build_provider(settings)
+        if self._provider is not None:
+            await self._provider.start()
+
+    async def close(self):
+        if self._provider is not None:
+            await self._provider.close()
+            self._provider = None
+
+    async def chat_completion(self, messages: list[dict], timeout: float | None = None, **params) -> Completion:
+        if self._provider is None:
+            raise LLMNotConfiguredError()
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                completion = await self._provider.complete(LLM_MODEL, messages, timeout or LLM_TIMEOUT_SECONDS, **params)
+            except LLMProviderError as exc:
+                record_llm_call(self._provider.name, "complete", time.perf_counter() - started,
+                                error=llm_error_class(exc.status_code))
+                if not exc.retryable or attempt >= LLM_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(exc, attempt))
+                attempt += 1
+                continue
+            record_llm_call(self._provider.name, "complete", time.perf_counter() - started,
+                            prompt_tokens=completion.prompt_tokens, completion_tokens=completion.completion_tokens)
+            return completion
+
+    async def stream_chat_completion(self, messages: list[dict], timeout: float | None = None, **params):
+        """Yields content deltas; retries only apply until the first delta arrives."""
+        if self._provider is None:
+            raise LLMNotConfiguredError()
+
+        provider = self._provider.name
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            stream = self._provider.stream(LLM_MODEL, messages, timeout or LLM_TIMEOUT_SECONDS, **params)
+            try:
+                first = await stream.__anext__()
+                record_llm_call(provider, "stream_first_delta", time.perf_counter() - started)
+                break
+            except StopAsyncIteration:
+                return
+            except LLMProviderError as exc:
+                await stream.aclose()
+                record_llm_call(provider, "stream", time.perf_counter() - started, error=llm_error_class(exc.status_code))
+                if not exc.retryable or attempt >= LLM_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(exc, attempt))
+                attempt += 1
+
+        error = None
+        try:
+            yield first
+            async for delta in stream:
+                yield delta
+        except LLMProviderError as exc:
+            error = llm_error_class(exc.status_code)
+            raise
+        finally:
+            await stream.aclose()
+            record_llm_call(provider, "stream", time.perf_counter() - started, error=error)
+
+
+llm_client = LLMClient()
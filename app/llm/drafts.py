@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.model import User
+from app.blog.model import Blog
+from app.llm.client import llm_client
+from app.llm.model import DraftJob, DraftJobStatus
+from app.llm.prompts import build_draft_messages, estimate_prompt_tokens
+from app.llm.scheduler import llm_scheduler, SchedulerSaturatedError
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+DRAFT_WORKERS = settings.draft_workers
+DRAFT_QUEUE_MAX_SIZE = settings.draft_queue_max_size
+DRAFT_MAX_ACTIVE_PER_USER = settings.draft_max_active_per_user
+DRAFT_MAX_COMPLETION_TOKENS = settings.draft_max_completion_tokens
+DRAFT_TIMEOUT_SECONDS = settings.draft_timeout_seconds
+DRAFT_STALE_AFTER_SECONDS = settings.draft_stale_after_seconds
+DRAFT_RECOVER_INTERVAL_SECONDS = settings.draft_recover_interval_seconds
+DRAFT_LONG_POLL_MAX_SECONDS = settings.draft_long_poll_max_seconds
+
+ACTIVE_STATUSES = (DraftJobStatus.PENDING.value, DraftJobStatus.RUNNING.value)
+TERMINAL_STATUSES = (DraftJobStatus.SUCCEEDED.value, DraftJobStatus.FAILED.value, DraftJobStatus.CANCELLED.value)
+
+
+class DraftQueueFullError(Exception):
+    pass
+
+
+class DraftLimitExceededError(Exception):
+    pass
+
+
+class DraftJobManager:
+    """
+    Runs long-form draft generation outside the request. Job state lives in `draft_jobs`, so
+    any worker can answer status polls and pending jobs survive a restart. Every state change
+    is a conditional UPDATE, which keeps several uvicorn workers from processing one job twice,
+    and every worker periodically takes over the jobs of workers that died.
+    """
+
+    def __init__(self, workers: int, queue_max_size: int, max_active_per_user: int):
+        self.workers = workers
+        self.queue_max_size = queue_max_size
+        self.max_active_per_user = max_active_per_user
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._worker_tasks: list[asyncio.Task] = []
+        self._queued: set[int] = set()
+        self._running: dict[int, asyncio.Task] = {}
+        self._events: dict[int, asyncio.Event] = {}
+        self._recover_task: asyncio.Task | None = None
+        self._session_factory: sessionmaker | None = None
+        self._closing = False
+
+    async def start(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+        self._closing = False
+        # A fresh queue per start: an asyncio.Queue stays bound to the loop it was first used on
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        try:
+            for job_id in await asyncio.to_thread(self._recover, True):
+                self._enqueue(job_id)
+        except Exception:
+            logger.exception("Could not recover pending draft jobs")
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._recover_task = asyncio.create_task(self._recover_periodically())
+
+    async def close(self):
+        self._closing = True
+        tasks = [*self._worker_tasks, *([self._recover_task] if self._recover_task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._recover_task = None
+
+    async def submit(self, user_id: int, topic: str, points: list[str], save_as_blog: bool) -> DraftJob:
+        if self._queue.qsize() >= self.queue_max_size:
+            raise DraftQueueFullError()
+        job = await asyncio.to_thread(self._create, user_id, topic, points, save_as_blog)
+        self._enqueue(job.id)
+        return job
+
+    async def wait(self, job_id: int, user_id: int, timeout: float) -> DraftJob | None:
+        # Long-poll: wake on local completion, re-check the table at least once a second
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await asyncio.to_thread(self._get, job_id, user_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job.status in TERMINAL_STATUSES or remaining <= 0:
+                if job is not None and job.status in TERMINAL_STATUSES:
+                    self._events.pop(job_id, None)
+                return job
+
+            event = self._events.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(1.0, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def cancel(self, job_id: int, user_id: int) -> DraftJob | None:
+        job = await asyncio.to_thread(self._mark_cancelled, job_id, user_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._notify(job_id)
+        return job
+
+    def _enqueue(self, job_id: int):
+        # The periodic recovery may find a job this worker has queued already
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _recover_periodically(self):
+        while True:
+            await asyncio.sleep(DRAFT_RECOVER_INTERVAL_SECONDS)
+            try:
+                for job_id in await asyncio.to_thread(self._recover, False):
+                    self._enqueue(job_id)
+            except Exception:
+                logger.exception("Could not recover stale draft jobs")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Draft job %s failed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: int):
+        job = await asyncio.to_thread(self._claim, job_id)
+        if job is None:
+            return
+
+        task = asyncio.create_task(self._generate(job))
+        self._running[job_id] = task
+        try:
+            content = await task
+        except asyncio.CancelledError:
+            if not self._closing:
+                # Cancelled by the user; the row is already marked cancelled
+                return
+            # Shutting down: hand the job back so the next start picks it up
+            task.cancel()
+            await asyncio.to_thread(self._transition, job_id, DraftJobStatus.RUNNING, DraftJobStatus.PENDING)
+            raise
+        except Exception as exc:
+            await asyncio.to_thread(self._transition, job_id, DraftJobStatus.RUNNING, DraftJobStatus.FAILED,
+                                    error=str(exc) or exc.__class__.__name__)
+        else:
+            await asyncio.to_thread(self._complete, job_id, content)
+        finally:
+            self._running.pop(job_id, None)
+            self._notify(job_id)
+
+    async def _generate(self, job: DraftJob) -> str:
+        messages = build_draft_messages(job.topic, json.loads(job.points))
+        while True:
+            try:
+                completion = await llm_scheduler.run(
+                    estimate_prompt_tokens(messages) + DRAFT_MAX_COMPLETION_TOKENS,
+                    lambda: llm_client.chat_completion(
+                        messages=messages,
+                        timeout=DRAFT_TIMEOUT_SECONDS,
+                        temperature=0.7,
+                        max_completion_tokens=DRAFT_MAX_COMPLETION_TOKENS,
+                    ),
+                )
+                break
+            except SchedulerSaturatedError as exc:
+                # Background work can afford to wait for the interactive traffic to drain
+                await asyncio.sleep(exc.retry_after)
+
+        content = completion.content.strip()
+        if not content:
+            raise ValueError("The model returned an empty draft.")
+        return content
+
+    def _notify(self, job_id: int):
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _create(self, user_id: int, topic: str, points: list[str], save_as_blog: bool) -> DraftJob:
+        with self._session_factory() as db:
+            # Other workers submit too: the user's row lock queues concurrent submissions on Postgres
+            # (SQLite serializes writers anyway), and the insert only happens while under the cap
+            db.execute(select(User.id).where(User.id == user_id).with_for_update())
+            active = select(func.count()).select_from(DraftJob) \
+                .where(DraftJob.user_id == user_id, DraftJob.status.in_(ACTIVE_STATUSES)).scalar_subquery()
+            job_id = db.execute(
+                insert(DraftJob).from_select(
+                    ["user_id", "topic", "points", "save_as_blog", "status"],
+                    select(literal(user_id), literal(topic), literal(json.dumps(points)), literal(save_as_blog),
+                           literal(DraftJobStatus.PENDING.value)).where(active < self.max_active_per_user),
+                ).returning(DraftJob.id)
+            ).scalar()
+            if job_id is None:
+                raise DraftLimitExceededError()
+            db.commit()
+            return db.get(DraftJob, job_id)
+
+    def _get(self, job_id: int, user_id: int) -> DraftJob | None:
+        with self._session_factory() as db:
+            return db.query(DraftJob).filter(DraftJob.id == job_id, DraftJob.user_id == user_id).first()
+
+    def _claim(self, job_id: int) -> DraftJob | None:
+        if not self._transition(job_id, DraftJobStatus.PENDING, DraftJobStatus.RUNNING):
+            return None
+        with self._session_factory() as db:
+            return db.get(DraftJob, job_id)
+
+    def _transition(self, job_id: int, from_status: DraftJobStatus, to_status: DraftJobStatus, **values) -> bool:
+        with self._session_factory() as db:
+            result = db.execute(
+                update(DraftJob)
+                .where(DraftJob.id == job_id, DraftJob.status == from_status.value)
+                .values(status=to_status.value, **values)
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def _complete(self, job_id: int, content: str):
+        with self._session_factory() as db:
+            job = db.query(DraftJob).filter(DraftJob.id == job_id,
+                                            DraftJob.status == DraftJobStatus.RUNNING.value).with_for_update().first()
+            if job is None:
+                # Cancelled while the model was still writing
+                return
+
+            job.status = DraftJobStatus.SUCCEEDED.value
+            job.content = content
+            if job.save_as_blog:
+                blog = Blog(title=job.topic[:255], content=content, user_id=job.user_id)
+                db.add(blog)
+                db.flush()
+                job.blog_id = blog.id
+            db.commit()
+
+    def _mark_cancelled(self, job_id: int, user_id: int) -> DraftJob | None:
+        with self._session_factory() as db:
+            db.execute(
+                update(DraftJob)
+                .where(DraftJob.id == job_id, DraftJob.user_id == user_id, DraftJob.status.in_(ACTIVE_STATUSES))
+                .values(status=DraftJobStatus.CANCELLED.value)
+            )
+            db.commit()
+            return db.query(DraftJob).filter(DraftJob.id == job_id, DraftJob.user_id == user_id).first()
+
+    def _recover(self, all_pending: bool) -> list[int]:
+        """
+        Ids of the jobs to queue here: those left running by a worker that died (no update for a
+        while), put back to pending, plus every pending job at startup or, later on, only the ones
+        pending for as long (queued in memory by a worker that died before claiming them).
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=DRAFT_STALE_AFTER_SECONDS)
+        with self._session_factory() as db:
+            reset = db.execute(
+                update(DraftJob)
+                .where(DraftJob.status == DraftJobStatus.RUNNING.value, DraftJob.updated_at < stale_before)
+                .values(status=DraftJobStatus.PENDING.value)
+                .returning(DraftJob.id)
+            ).scalars().all()
+            db.commit()
+            query = db.query(DraftJob.id).filter(DraftJob.status == DraftJobStatus.PENDING.value)
+            if not all_pending:
+                query = query.filter(DraftJob.updated_at < stale_before)
+            return sorted({*reset, *(row.id for row in query)})
+
+
+draft_manager = DraftJobManager(DRAFT_WORKERS, DRAFT_QUEUE_MAX_SIZE, DRAFT_MAX_ACTIVE_PER_USER)
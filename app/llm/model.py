@@ -0,0 +1,36 @@
+from enum import Enum
+
+from sqlalchemy import Column, Integer, DateTime, Boolean, func, String, Text, ForeignKey
+
+from app.database import Base
+
+
+class DraftJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class DraftJob(Base):
+    __tablename__ = "draft_jobs"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Foreign Keys
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    blog_id = Column(Integer, ForeignKey("blogs.id"), nullable=True)
+
+    # Fields
+    topic = Column(String(255), nullable=False)
+    points = Column(Text, nullable=False)  # JSON-encoded list of strings
+    save_as_blog = Column(Boolean, default=False)
+    status = Column(String(20), nullable=False, default=DraftJobStatus.PENDING.value, index=True)
+    content = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Additional Fields
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
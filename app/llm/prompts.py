@@ -0,0 +1,41 @@
+PROMPT_VERSION = "topics-v1"  # bump whenever the prompt text changes so cached answers are not reused
+
+TOPIC_SYSTEM_INSTRUCTION = """You are an expert blog content assistant. Your task is to generate blog topics and points based on user-provided keywords. You must always return valid JSON in the specified format, with no extra text."""
+
+
+def build_topic_prompt(keywords_list: list[str]) -> str:
+    keywords_str = ", ".join(keywords_list)  # "python, fastAPI, router"
+    return """Given the following keywords: [""" + keywords_str + """], generate 3 blog topics in a general blog style. Each topic should have exactly 3 points explaining what can be written about. All points should try to include the provided keywords where possible. Return strictly in this JSON format:\n\n[\n  {\n    \"topic\": \"Topic 1\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 2\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 3\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  }\n]\n\nDo not add any extra text outside the JSON array."""
+
+
+def build_topic_messages(keywords_list: list[str]) -> list[dict]:
+    return [
+        {"role": "system", "content": TOPIC_SYSTEM_INSTRUCTION},
+        {"role": "user", "content": build_topic_prompt(keywords_list)},
+    ]
+
+
+def build_batch_topic_messages(keyword_lists: list[list[str]]) -> list[dict]:
+    numbered = "\n".join(f"{i}: [{', '.join(keywords)}]" for i, keywords in enumerate(keyword_lists, start=1))
+    prompt = """For each numbered keyword list below, generate 3 blog topics in a general blog style. Each topic should have exactly 3 points explaining what can be written about. All points should try to include that list's keywords where possible. Return strictly one JSON object whose keys are the list numbers as strings and whose values are arrays in this format:\n\n[\n  {\n    \"topic\": \"Topic 1\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 2\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 3\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  }\n]\n\nDo not add any extra text outside the JSON object.\n\nKeyword lists:\n""" + numbered
+    return [
+        {"role": "system", "content": TOPIC_SYSTEM_INSTRUCTION},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def estimate_prompt_tokens(messages: list[dict]) -> int:
+    # Rough 4-characters-per-token estimate, good enough for rate budgeting
+    return sum(len(message["content"]) for message in messages) // 4
+
+
+DRAFT_SYSTEM_INSTRUCTION = """You are an expert blog writer. Write complete, well-structured blog posts in Markdown. Return only the post, with no extra commentary."""
+
+
+def build_draft_messages(topic: str, points: list[str]) -> list[dict]:
+    points_str = "\n".join(f"- {point}" for point in points)
+    prompt = """Write a full blog post titled \"""" + topic + """\". Cover each of the following points in its own section, with an introduction and a conclusion:\n\n""" + points_str
+    return [
+        {"role": "system", "content": DRAFT_SYSTEM_INSTRUCTION},
+        {"role": "user", "content": prompt},
+    ]
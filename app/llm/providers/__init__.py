@@ -0,0 +1,13 @@
+from app.llm.providers.base import LLMProvider, LLMProviderError, Completion
+from app.llm.providers.fake_provider import FakeProvider, build_fake_provider
+from app.llm.providers.groq_provider import GroqProvider, build_groq_provider
+from app.settings import Settings
+
+
+def build_provider(settings: Settings) -> LLMProvider | None:
+    """Provider selected by LLM_PROVIDER; None when the real provider has no credentials."""
+    if settings.llm_provider == "fake":
+        return build_fake_provider(settings)
+    if settings.llm_provider == "groq":
+        return build_groq_provider(settings)
+    raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+
+@dataclass
+class Completion:
+    content: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+class LLMProviderError(Exception):
+    """Provider failure normalized across backends; `retryable` marks 429/5xx/transport errors."""
+
+    def __init__(self, message: str, status_code: int | None = None, retryable: bool = False,
+                 retry_after: float | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class LLMProvider:
+    name = "base"
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def complete(self, model: str, messages: list[dict], timeout: float, **params) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, model: str, messages: list[dict], timeout: float, **params) -> AsyncIterator[str]:
+        """Async iterator of content deltas."""
+        raise NotImplementedError
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import deque
+
+from app.llm.providers.base import LLMProvider, LLMProviderError, Completion
+from app.settings import Settings
+
+
+def fake_answer(messages: list[dict]) -> str:
+    # Deterministic output derived from the prompt: topic JSON when JSON is asked for, else a Markdown draft
+    system, prompt = messages[0]["content"], messages[-1]["content"]
+    if "JSON" not in system:
+        title = re.search(r'"(.+?)"', prompt)
+        points = re.findall(r"^- (.+)$", prompt, flags=re.MULTILINE)
+        sections = "\n\n".join(f"## {point}\n\nA few paragraphs about {point.lower()}." for point in points)
+        return f"# {title.group(1) if title else 'Draft'}\n\nIntroduction.\n\n{sections}\n\n## Conclusion\n\nWrap-up."
+
+    def topics_for(subject: str) -> list[dict]:
+        return [
+            {"topic": f"Topic {i} on {subject}", "points": [f"Point {j} about {subject}" for j in range(1, 4)]}
+            for i in range(1, 4)
+        ]
+
+    numbered = re.findall(r"^(\d+): \[([^\]]*)\]$", prompt, flags=re.MULTILINE)
+    if numbered:
+        # Micro-batched prompt: one array per numbered keyword list
+        return json.dumps({number: topics_for(subject) for number, subject in numbered}, indent=2)
+
+    keywords = re.search(r"\[([^\]]*)\]", prompt)
+    return json.dumps(topics_for(keywords.group(1) if keywords else "your keywords"), indent=2)
+
+
+def _tokenize(text: str) -> list[str]:
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Local provider returning schema-valid answers, for load tests and benchmarks without a key
+    or network. Latency, streaming pace, error/429 injection and throughput limits are tunable
+    so the caching, scheduling and streaming paths can be measured against realistic numbers.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_distribution: str = "fixed", latency_seconds: float = 0.05,
+                 latency_jitter_seconds: float = 0.0, tokens_per_second: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, max_concurrency: int = 0, requests_per_minute: int = 0,
+                 seed: int | None = None):
+        self.latency_distribution = latency_distribution
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._random = random.Random(seed)
+        self._in_flight = 0
+        self._recent_requests: deque[float] = deque()
+
+    def _latency(self) -> float:
+        mean, jitter = self.latency_seconds, self.latency_jitter_seconds
+        if self.latency_distribution == "uniform":
+            value = self._random.uniform(mean - jitter, mean + jitter)
+        elif self.latency_distribution == "normal":
+            value = self._random.gauss(mean, jitter)
+        elif self.latency_distribution == "lognormal" and mean > 0:
+            # Parameterized so the distribution keeps the configured mean and standard deviation
+            sigma_sq = math.log(1 + (jitter / mean) ** 2)
+            value = self._random.lognormvariate(math.log(mean) - sigma_sq / 2, sigma_sq ** 0.5)
+        else:
+            value = mean
+        return max(0.0, value)
+
+    def _admit(self):
+        if self.requests_per_minute:
+            now = time.monotonic()
+            while self._recent_requests and now - self._recent_requests[0] >= 60:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.requests_per_minute:
+                retry_after = 60 - (now - self._recent_requests[0])
+                raise LLMProviderError("Fake provider: requests per minute exceeded", status_code=429,
+                                       retryable=True, retry_after=retry_after)
+            self._recent_requests.append(now)
+
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            raise LLMProviderError("Fake provider: too many concurrent requests", status_code=429, retryable=True)
+
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            raise LLMProviderError("Fake provider: injected rate limit", status_code=429, retryable=True,
+                                   retry_after=1.0)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise LLMProviderError("Fake provider: injected server error", status_code=500, retryable=True)
+
+    async def complete(self, model: str, messages: list[dict], timeout: float, **params) -> Completion:
+        self._admit()
+        self._in_flight += 1
+        try:
+            content = fake_answer(messages)
+            tokens = _tokenize(content)
+            duration = self._latency()
+            if self.tokens_per_second:
+                duration += len(tokens) / self.tokens_per_second
+            await asyncio.wait_for(asyncio.sleep(duration), timeout=timeout)
+        except asyncio.TimeoutError as exc:
+            raise LLMProviderError("Fake provider: timed out", retryable=True) from exc
+        finally:
+            self._in_flight -= 1
+
+        prompt_tokens = sum(len(_tokenize(message["content"])) for message in messages)
+        return Completion(content=content, prompt_tokens=prompt_tokens, completion_tokens=len(tokens))
+
+    async def stream(self, model: str, messages: list[dict], timeout: float, **params):
+        self._admit()
+        self._in_flight += 1
+        try:
+            # Latency models time to first token; tokens_per_second paces the rest
+            await asyncio.sleep(self._latency())
+            for token in _tokenize(fake_answer(messages)):
+                if self.tokens_per_second:
+                    await asyncio.sleep(1 / self.tokens_per_second)
+                yield token
+        finally:
+            self._in_flight -= 1
+
+
+def build_fake_provider(settings: Settings) -> FakeProvider:
+    return FakeProvider(
+        latency_distribution=settings.fake_llm_latency_distribution,
+        latency_seconds=settings.fake_llm_latency_seconds,
+        latency_jitter_seconds=settings.fake_llm_latency_jitter_seconds,
+        tokens_per_second=settings.fake_llm_tokens_per_second,
+        error_rate=settings.fake_llm_error_rate,
+        rate_limit_rate=settings.fake_llm_rate_limit_rate,
+        max_concurrency=settings.fake_llm_max_concurrency,
+        requests_per_minute=settings.fake_llm_requests_per_minute,
+        seed=settings.fake_llm_seed,
+    )
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+from app.llm.providers.base import LLMProvider, LLMProviderError, Completion
+from app.settings import Settings
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _retry_after(exc) -> float | None:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqProvider(LLMProvider):
+    """Groq chat completions over one pooled httpx client for the lifetime of the app."""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, timeout: float, max_connections: int):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+
+    async def start(self):
+        # Lazy import to avoid hard dependency at import time
+        import httpx
+        from groq import AsyncGroq
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            timeout=self.timeout,
+        )
+        # Retries are handled by LLMClient so backoff and jitter stay under our control
+        self._client = AsyncGroq(api_key=self.api_key, http_client=http_client, max_retries=0, timeout=self.timeout)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def complete(self, model: str, messages: list[dict], timeout: float, **params) -> Completion:
+        with _translate_groq_errors():
+            response = await self._client.chat.completions.create(
+                model=model, messages=messages, timeout=timeout, **params
+            )
+
+        usage = response.usage
+        return Completion(
+            content=response.choices[0].message.content or "",
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+        )
+
+    async def stream(self, model: str, messages: list[dict], timeout: float, **params):
+        with _translate_groq_errors():
+            stream = await self._client.chat.completions.create(
+                model=model, messages=messages, timeout=timeout, stream=True, **params
+            )
+        try:
+            with _translate_groq_errors():
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+
+@contextmanager
+def _translate_groq_errors():
+    from groq import APIConnectionError, APIStatusError
+
+    try:
+        yield
+    except APIStatusError as exc:
+        raise LLMProviderError(str(exc), status_code=exc.status_code,
+                               retryable=exc.status_code in RETRYABLE_STATUS_CODES,
+                               retry_after=_retry_after(exc)) from exc
+    except APIConnectionError as exc:
+        # Also covers APITimeoutError
+        raise LLMProviderError(str(exc), retryable=True) from exc
+
+
+def build_groq_provider(settings: Settings) -> GroqProvider | None:
+    if not settings.groq_api_key:
+        return None
+    return GroqProvider(settings.groq_api_key, settings.llm_timeout_seconds, settings.llm_max_connections)
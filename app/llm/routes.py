@@ -1,57 +1,214 @@
-import os
+import logging
+import math
+from contextlib import AsyncExitStack
 
-from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
-from app.auth.model import User
+from app.auth.principal import Principal
 from app.auth_util import get_current_user
 from app.global_constants import ErrorMessage, SuccessMessage
-from app.llm.schema import TopicKeyword
-from app.utils import get_response_schema
+from app.llm.cache import response_cache, make_cache_key
+from app.llm.client import llm_client, LLM_MODEL
+from app.llm.drafts import draft_manager, DraftLimitExceededError, DraftQueueFullError, DRAFT_LONG_POLL_MAX_SECONDS
+from app.llm.prompts import build_topic_messages, estimate_prompt_tokens, PROMPT_VERSION
+from app.llm.scheduler import llm_scheduler, SchedulerSaturatedError
+from app.llm.schema import TopicKeyword, DraftCreate, DraftJobResponse
+from app.llm.similarity import similarity_index, LLM_SIMILARITY_ENABLED
+from app.llm.stream_parser import TopicStreamParser
+from app.llm.topics import generate_topics, max_completion_tokens, topic_batcher
+from app.utils import get_response_schema, format_sse_event
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/llm", tags=["LLM"])
 
 @router.post("/suggest-topics")
-def suggest_topics(request: TopicKeyword, current_user: User = Depends(get_current_user)):
+async def suggest_topics(request: TopicKeyword, current_user: Principal = Depends(get_current_user)):
 
-    keywords_list = request.topics
-    keywords_str = ", ".join(keywords_list)  # "python, fastAPI, router"
-
-    system_instruction = """You are an expert blog content assistant. Your task is to generate blog topics and points based on user-provided keywords. You must always return valid JSON in the specified format, with no extra text."""
-    prompt = """Given the following keywords: [""" + keywords_str + """], generate 3 blog topics in a general blog style. Each topic should have exactly 3 points explaining what can be written about. All points should try to include the provided keywords where possible. Return strictly in this JSON format:\n\n[\n  {\n    \"topic\": \"Topic 1\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 2\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  },\n  {\n    \"topic\": \"Topic 3\",\n    \"points\": [\"Point 1\", \"Point 2\", \"Point 3\"]\n  }\n]\n\nDo not add any extra text outside the JSON array."""
-
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+    if not llm_client.is_configured:
         # Return a descriptive error for missing key in development
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=ErrorMessage.SERVER_MISCONFIGURED.value)
 
+    # Where the answer came from: cache, similarity (near-duplicate keyword set) or provider
+    served = {"source": "cache"}
+
+    async def compute():
+        match = _similar_answer(request.topics)
+        if match is not None:
+            served.update(source="similarity", score=match.score)
+            return match.answer
+        served["source"] = "provider"
+        answer = await generate_topics(request.topics)
+        _remember_answer(request.topics, answer)
+        return answer
+
     try:
-        # Lazy import to avoid hard dependency at import time
-        from groq import Groq
-
-        client = Groq(api_key=api_key)
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
-            max_completion_tokens=int(os.getenv("MAX_CONTEXT_TOKENS")),
-            top_p=1
-        )
-
-        answer = (response.choices[0].message.content or "").strip()
-        if not answer:
-            answer = "The document does not contain that information."
-
-        return get_response_schema(answer, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+        # temperature=0, so identical normalized keyword sets share one answer
+        cache_key = make_cache_key(request.topics, LLM_MODEL, PROMPT_VERSION)
+        answer = await response_cache.get_or_compute(cache_key, compute)
+
+        response = get_response_schema(answer, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+        response.headers["X-LLM-Source"] = served["source"]
+        if "score" in served:
+            response.headers["X-LLM-Similarity"] = f"{served['score']:.3f}"
+        return response
 
+    except SchedulerSaturatedError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=ErrorMessage.LLM_BUSY.value,
+                            headers={"Retry-After": str(math.ceil(exc.retry_after))}) from exc
     except Exception as exc:
         # Generic failure path per plan
-        print("Exception occurred: ", exc)
+        logger.exception("Topic generation failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=ErrorMessage.ANSWER_GENERATION_FAILED.value) from exc
+
+
+def _similar_answer(keywords_list: list[str]):
+    if not LLM_SIMILARITY_ENABLED:
+        return None
+    return similarity_index.lookup(LLM_MODEL + ":" + PROMPT_VERSION, keywords_list)
+
+
+def _remember_answer(keywords_list: list[str], answer: str):
+    if LLM_SIMILARITY_ENABLED:
+        similarity_index.add(LLM_MODEL + ":" + PROMPT_VERSION, keywords_list, answer)
+
+
+@router.post("/suggest-topics/stream")
+async def suggest_topics_stream(request: TopicKeyword, current_user: Principal = Depends(get_current_user)):
+
+    if not llm_client.is_configured:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=ErrorMessage.SERVER_MISCONFIGURED.value)
+    if llm_scheduler.is_saturated():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=ErrorMessage.LLM_BUSY.value, headers={"Retry-After": "1"})
+
+    return StreamingResponse(
+        _topic_events(request.topics),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _topic_events(keywords_list: list[str]):
+    # One `topic` event per completed object, then a `summary` (or `error`) event
+    cache_key = make_cache_key(keywords_list, LLM_MODEL, PROMPT_VERSION)
+    cached = await response_cache.get(cache_key)
+    if cached is None:
+        match = _similar_answer(keywords_list)
+        if match is not None:
+            cached = match.answer
+
+    parser = TopicStreamParser()
+    topics = []
+    chunks = []
+    try:
+        async with AsyncExitStack() as stack:
+            if cached is not None:
+                deltas = _replay(cached)
+            else:
+                messages = build_topic_messages(keywords_list)
+                # Hold a dispatch slot for the whole stream
+                await stack.enter_async_context(
+                    llm_scheduler.slot(estimate_prompt_tokens(messages) + max_completion_tokens())
+                )
+                deltas = llm_client.stream_chat_completion(
+                    messages=messages,
+                    temperature=0,
+                    max_completion_tokens=max_completion_tokens(),
+                    top_p=1,
+                )
+            async for delta in deltas:
+                chunks.append(delta)
+                for topic in parser.feed(delta):
+                    topics.append(topic)
+                    yield format_sse_event("topic", topic)
+        parser.close()
+    except SchedulerSaturatedError as exc:
+        yield format_sse_event("error", {
+            "message": ErrorMessage.LLM_BUSY.value,
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "retry_after": math.ceil(exc.retry_after),
+            "delivered": len(topics),
+        })
+        return
+    except Exception:
+        logger.exception("Topic stream failed")
+        yield format_sse_event("error", {
+            "message": ErrorMessage.ANSWER_GENERATION_FAILED.value,
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "delivered": len(topics),
+        })
+        return
+
+    if cached is None:
+        answer = "".join(chunks).strip()
+        await response_cache.set(cache_key, answer)
+        _remember_answer(keywords_list, answer)
+
+    yield format_sse_event("summary", {
+        "message": SuccessMessage.RECORD_RETRIEVED.value,
+        "status": status.HTTP_200_OK,
+        "results": topics,
+    })
+
+
+async def _replay(answer: str):
+    yield answer
+
+
+@router.get("/stats")
+def llm_stats(current_user: Principal = Depends(get_current_user)):
+    return_data = {
+        "cache": response_cache.stats(),
+        "similarity": similarity_index.stats(),
+        "scheduler": llm_scheduler.stats(),
+        "batching": topic_batcher.stats(),
+    }
+    return get_response_schema(return_data, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK)
+
+
+@router.post("/drafts")
+async def create_draft(payload: DraftCreate, current_user: Principal = Depends(get_current_user)):
+
+    if not llm_client.is_configured:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=ErrorMessage.SERVER_MISCONFIGURED.value)
+
+    try:
+        job = await draft_manager.submit(current_user.id, payload.topic, payload.points, payload.save_as_blog)
+    except DraftLimitExceededError:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail=ErrorMessage.DRAFT_LIMIT_REACHED.value)
+    except DraftQueueFullError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=ErrorMessage.LLM_BUSY.value, headers={"Retry-After": "30"})
+
+    return get_response_schema(DraftJobResponse.model_validate(job), SuccessMessage.RECORD_CREATED.value,
+                               status.HTTP_202_ACCEPTED)
+
+
+@router.get("/drafts/{id}")
+async def get_draft(id: int, wait: float = Query(0, ge=0, le=DRAFT_LONG_POLL_MAX_SECONDS),
+                    current_user: Principal = Depends(get_current_user)):
+    # `wait` > 0 long-polls until the job finishes or the timeout passes
+    job = await draft_manager.wait(id, current_user.id, wait)
+    if not job:
+        return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+    return get_response_schema(DraftJobResponse.model_validate(job), SuccessMessage.RECORD_RETRIEVED.value,
+                               status.HTTP_200_OK)
+
+
+@router.post("/drafts/{id}/cancel")
+async def cancel_draft(id: int, current_user: Principal = Depends(get_current_user)):
+    job = await draft_manager.cancel(id, current_user.id)
+    if not job:
+        return get_response_schema({}, ErrorMessage.NOT_FOUND.value, status.HTTP_404_NOT_FOUND)
+
+    return get_response_schema(DraftJobResponse.model_validate(job), SuccessMessage.RECORD_UPDATED.value,
+                               status.HTTP_200_OK)
@@ -0,0 +1,213 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from app.settings import get_settings
+
+settings = get_settings()
+
+LLM_MAX_CONCURRENCY = settings.llm_max_concurrency
+LLM_REQUESTS_PER_MINUTE = settings.llm_requests_per_minute
+LLM_TOKENS_PER_MINUTE = settings.llm_tokens_per_minute
+LLM_QUEUE_MAX_SIZE = settings.llm_queue_max_size
+LLM_QUEUE_MAX_WAIT_SECONDS = settings.llm_queue_max_wait_seconds
+LLM_BATCH_WINDOW_MS = settings.llm_batch_window_ms
+LLM_BATCH_MAX_SIZE = settings.llm_batch_max_size
+
+
+class SchedulerSaturatedError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM dispatch queue is saturated, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """
+    Admission control for provider calls: caps in-flight calls, enforces requests- and
+    tokens-per-minute budgets, and queues excess work for a bounded time before failing fast.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int,
+                 queue_max_size: int, queue_max_wait: float):
+        self.queue_max_size = queue_max_size
+        self.queue_max_wait = queue_max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._budget_lock = asyncio.Lock()
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def is_saturated(self) -> bool:
+        return self.queue_depth >= self.queue_max_size
+
+    def _retry_after(self) -> float:
+        return max(1.0, self._requests.wait_time(1))
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        if self.is_saturated():
+            self.rejected += 1
+            raise SchedulerSaturatedError(self._retry_after())
+
+        self.queue_depth += 1
+        started = time.monotonic()
+        deadline = started + self.queue_max_wait
+        acquired = False
+        try:
+            if self._semaphore.locked():
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_max_wait)
+                except asyncio.TimeoutError:
+                    raise SchedulerSaturatedError(self._retry_after())
+            else:
+                # Free slot: take it without going through wait_for's extra task
+                await self._semaphore.acquire()
+            acquired = True
+
+            async with self._budget_lock:
+                while True:
+                    wait = max(self._requests.wait_time(1), self._tokens.wait_time(estimated_tokens))
+                    if wait == 0:
+                        self._requests.take(1)
+                        self._tokens.take(estimated_tokens)
+                        break
+                    if time.monotonic() + wait > deadline:
+                        raise SchedulerSaturatedError(wait)
+                    await asyncio.sleep(wait)
+        except BaseException as exc:
+            if acquired:
+                self._semaphore.release()
+            if isinstance(exc, SchedulerSaturatedError):
+                self.rejected += 1
+            raise
+        finally:
+            self.queue_depth -= 1
+            waited = time.monotonic() - started
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def run(self, estimated_tokens: int, call):
+        async with self.slot(estimated_tokens):
+            return await call()
+
+    def stats(self) -> dict:
+        waits = self.admitted + self.rejected
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds_avg": self.wait_seconds_total / waits if waits else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "requests_budget_remaining": math.floor(self._requests.tokens),
+            "tokens_budget_remaining": math.floor(self._tokens.tokens),
+        }
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within `window_seconds` (up to `max_size`) and hands them to
+    `handler` in one call. The handler returns one result per item; an Exception in that
+    list fails only the matching caller.
+    """
+
+    def __init__(self, handler, window_seconds: float, max_size: int):
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.batched_items = 0
+        self.batch_size_max = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size or self.window_seconds <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[object, asyncio.Future]]):
+        self.batches += 1
+        self.batched_items += len(batch)
+        self.batch_size_max = max(self.batch_size_max, len(batch))
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "batch_size_avg": self.batched_items / self.batches if self.batches else 0.0,
+            "batch_size_max": self.batch_size_max,
+            "pending": len(self._pending),
+        }
+
+
+llm_scheduler = LLMScheduler(LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE,
+                             LLM_QUEUE_MAX_SIZE, LLM_QUEUE_MAX_WAIT_SECONDS)
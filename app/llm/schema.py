@@ -1,7 +1,34 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class TopicKeyword(BaseModel):
-    topics: List[str]
\ No newline at end of file
+    topics: List[str]
+
+class TopicSuggestion(BaseModel):
+    topic: str
+    points: List[str]
+
+
+class DraftCreate(BaseModel):
+    # DraftJob.topic (and the blog title it may become) is VARCHAR(255)
+    topic: str = Field(max_length=255)
+    points: List[str]
+    save_as_blog: bool = False
+
+
+class DraftJobResponse(BaseModel):
+    id: int
+    topic: str
+    status: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    blog_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,179 @@
+import json
+import logging
+import math
+import os
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.llm.cache import normalize_keywords
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+LLM_SIMILARITY_ENABLED = settings.llm_similarity_enabled
+LLM_SIMILARITY_THRESHOLD = settings.llm_similarity_threshold
+LLM_SIMILARITY_KEYWORD_THRESHOLD = settings.llm_similarity_keyword_threshold
+LLM_SIMILARITY_MAX_ENTRIES = settings.llm_similarity_max_entries
+LLM_SIMILARITY_INDEX_PATH = settings.llm_similarity_index_path
+
+NGRAM_SIZE = 3
+VECTOR_DIMENSIONS = 1 << 16
+
+
+def vectorize_keywords(keywords: list[str]) -> dict[int, float]:
+    """Hashed character n-gram vector of a keyword set, L2-normalized. Fully local, no network."""
+    counts: dict[int, float] = {}
+    for keyword in normalize_keywords(keywords):
+        padded = f"#{keyword}#"
+        for i in range(max(1, len(padded) - NGRAM_SIZE + 1)):
+            bucket = zlib.crc32(padded[i:i + NGRAM_SIZE].encode("utf-8")) % VECTOR_DIMENSIONS
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    if not norm:
+        return {}
+    return {bucket: value / norm for bucket, value in counts.items()}
+
+
+def _cosine(left: dict[int, float], right: dict[int, float]) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(bucket, 0.0) for bucket, weight in left.items())
+
+
+def keywords_align(left: list[str], right: list[str], threshold: float) -> bool:
+    """True when both normalized sets have the same size and pair up one-to-one above `threshold`."""
+    if len(left) != len(right):
+        return False
+    left_vectors = [vectorize_keywords([keyword]) for keyword in left]
+    right_vectors = [vectorize_keywords([keyword]) for keyword in right]
+    pairs = sorted(((_cosine(a, b), i, j) for i, a in enumerate(left_vectors) for j, b in enumerate(right_vectors)),
+                   reverse=True)
+    matched_left, matched_right = set(), set()
+    for score, i, j in pairs:
+        if score < threshold:
+            break
+        if i not in matched_left and j not in matched_right:
+            matched_left.add(i)
+            matched_right.add(j)
+    return len(matched_left) == len(left)
+
+
+@dataclass(frozen=True)
+class SimilarityMatch:
+    keywords: list[str]
+    answer: str
+    score: float
+
+
+@dataclass
+class _IndexEntry:
+    namespace: str
+    keywords: list[str]
+    answer: str
+    vector: dict[int, float]
+
+
+class SimilarityIndex:
+    """
+    In-memory nearest-neighbour index of past keyword sets and their answers.
+    Candidates are found through an inverted index over n-gram buckets, then ranked by cosine.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, path: str = "",
+                 keyword_threshold: float = LLM_SIMILARITY_KEYWORD_THRESHOLD):
+        self.threshold = threshold
+        self.keyword_threshold = keyword_threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, _IndexEntry] = OrderedDict()
+        self._postings: dict[int, set[tuple]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, namespace: str, keywords: list[str]) -> SimilarityMatch | None:
+        normalized = normalize_keywords(keywords)
+        vector = vectorize_keywords(normalized)
+        scores: dict[tuple, float] = {}
+        for bucket, weight in vector.items():
+            for entry_key in self._postings.get(bucket, ()):
+                if entry_key[0] == namespace:
+                    scores[entry_key] = scores.get(entry_key, 0.0) + weight * self._entries[entry_key].vector[bucket]
+
+        # The set-level score only shortlists; the best candidate whose keywords pair up wins
+        best_key = None
+        for entry_key in sorted(scores, key=scores.get, reverse=True):
+            if scores[entry_key] < self.threshold:
+                break
+            if keywords_align(normalized, self._entries[entry_key].keywords, self.keyword_threshold):
+                best_key = entry_key
+                break
+        if best_key is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_key)
+        entry = self._entries[best_key]
+        return SimilarityMatch(keywords=entry.keywords, answer=entry.answer, score=scores[best_key])
+
+    def add(self, namespace: str, keywords: list[str], answer: str):
+        normalized = normalize_keywords(keywords)
+        entry_key = (namespace, tuple(normalized))
+        if entry_key in self._entries:
+            self._remove(entry_key)
+
+        entry = _IndexEntry(namespace=namespace, keywords=normalized, answer=answer,
+                            vector=vectorize_keywords(normalized))
+        self._entries[entry_key] = entry
+        for bucket in entry.vector:
+            self._postings.setdefault(bucket, set()).add(entry_key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_key: tuple):
+        entry = self._entries.pop(entry_key)
+        for bucket in entry.vector:
+            postings = self._postings[bucket]
+            postings.discard(entry_key)
+            if not postings:
+                del self._postings[bucket]
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for item in json.load(f):
+                    self.add(item["namespace"], item["keywords"], item["answer"])
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.exception("Could not load similarity index")
+
+    def save(self):
+        if not self.path:
+            return
+        items = [
+            {"namespace": entry.namespace, "keywords": entry.keywords, "answer": entry.answer}
+            for entry in self._entries.values()
+        ]
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(items, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.exception("Could not save similarity index")
+
+    def stats(self) -> dict:
+        return {"enabled": LLM_SIMILARITY_ENABLED, "entries": len(self._entries), "hits": self.hits,
+                "misses": self.misses}
+
+
+similarity_index = SimilarityIndex(LLM_SIMILARITY_THRESHOLD, LLM_SIMILARITY_MAX_ENTRIES, LLM_SIMILARITY_INDEX_PATH)
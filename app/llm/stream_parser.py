@@ -0,0 +1,75 @@
+import json
+
+from pydantic import ValidationError
+
+from app.llm.schema import TopicSuggestion
+
+
+class TopicStreamError(ValueError):
+    pass
+
+
+class TopicStreamParser:
+    """
+    Incrementally extracts complete `{topic, points}` objects from a streamed JSON array.
+    Text before the opening `[` and after the closing `]` (e.g. markdown fences) is ignored.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._current: list[str] = []
+
+    def feed(self, chunk: str) -> list[dict]:
+        completed = []
+        for ch in chunk:
+            if self._finished:
+                continue
+
+            if not self._started:
+                self._started = ch == "["
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._current = [ch]
+                elif ch == "]":
+                    self._finished = True
+                elif ch != "," and not ch.isspace():
+                    raise TopicStreamError(f"Unexpected character {ch!r} between topics")
+                continue
+
+            self._current.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(self._parse_current())
+
+        return completed
+
+    def close(self):
+        if not self._finished:
+            raise TopicStreamError("Stream ended before the topic array was closed")
+
+    def _parse_current(self) -> dict:
+        raw = "".join(self._current)
+        self._current = []
+        try:
+            return TopicSuggestion.model_validate(json.loads(raw)).model_dump()
+        except (json.JSONDecodeError, ValidationError) as exc:
+            raise TopicStreamError(f"Malformed topic object: {raw[:200]}") from exc
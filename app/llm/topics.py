@@ -0,0 +1,94 @@
+import json
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.llm.client import llm_client
+from app.llm.prompts import build_topic_messages, build_batch_topic_messages, estimate_prompt_tokens
+from app.llm.scheduler import llm_scheduler, MicroBatcher, LLM_BATCH_WINDOW_MS, LLM_BATCH_MAX_SIZE
+from app.llm.schema import TopicSuggestion
+from app.settings import get_settings
+
+settings = get_settings()
+
+LLM_BATCH_MAX_KEYWORDS = settings.llm_batch_max_keywords
+
+_topic_list_adapter = TypeAdapter(list[TopicSuggestion])
+
+
+def max_completion_tokens() -> int:
+    return settings.max_context_tokens
+
+
+async def generate_topics(keywords_list: list[str]) -> str:
+    if len(keywords_list) <= LLM_BATCH_MAX_KEYWORDS:
+        return await topic_batcher.submit(keywords_list)
+    return await _generate_single(keywords_list)
+
+
+async def _generate_single(keywords_list: list[str]) -> str:
+    messages = build_topic_messages(keywords_list)
+    completion_tokens = max_completion_tokens()
+    completion = await llm_scheduler.run(
+        estimate_prompt_tokens(messages) + completion_tokens,
+        lambda: llm_client.chat_completion(
+            messages=messages,
+            temperature=0,
+            max_completion_tokens=completion_tokens,
+            top_p=1
+        ),
+    )
+
+    answer = completion.content.strip()
+    if not answer:
+        answer = "The document does not contain that information."
+    return answer
+
+
+async def _generate_batch(keyword_lists: list[list[str]]) -> list:
+    if len(keyword_lists) == 1:
+        return [await _generate_single(keyword_lists[0])]
+
+    messages = build_batch_topic_messages(keyword_lists)
+    completion_tokens = max_completion_tokens() * len(keyword_lists)
+    completion = await llm_scheduler.run(
+        estimate_prompt_tokens(messages) + completion_tokens,
+        lambda: llm_client.chat_completion(
+            messages=messages,
+            temperature=0,
+            max_completion_tokens=completion_tokens,
+            top_p=1
+        ),
+    )
+    answers = _split_batch_answer(completion.content, len(keyword_lists))
+
+    # Anything the combined answer did not cover falls back to its own call
+    results = []
+    for keywords_list, answer in zip(keyword_lists, answers):
+        if answer is None:
+            try:
+                answer = await _generate_single(keywords_list)
+            except Exception as exc:
+                answer = exc
+        results.append(answer)
+    return results
+
+
+def _split_batch_answer(content: str, count: int) -> list[str | None]:
+    try:
+        parsed = json.loads(content[content.index("{"):content.rindex("}") + 1])
+    except ValueError:
+        return [None] * count
+    if not isinstance(parsed, dict):
+        return [None] * count
+
+    answers = []
+    for i in range(1, count + 1):
+        try:
+            topics = _topic_list_adapter.validate_python(parsed.get(str(i)))
+            answers.append(json.dumps([topic.model_dump() for topic in topics], indent=2))
+        except ValidationError:
+            answers.append(None)
+    return answers
+
+
+topic_batcher = MicroBatcher(_generate_batch, LLM_BATCH_WINDOW_MS / 1000, LLM_BATCH_MAX_SIZE)
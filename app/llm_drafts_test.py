@@ -0,0 +1,125 @@
+import os
+import tempfile
+
+# app.main builds its module-level app on import; the tests build their own against a scratch file
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "llm-drafts-test-secret")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.auth.model import User
+from app.llm.drafts import DraftLimitExceededError, draft_manager
+from app.llm.model import DraftJob
+from app.main import create_app
+from app.settings import get_settings
+
+DRAFT = {"topic": "Async Python", "points": ["event loops", "tasks"]}
+
+
+@pytest.fixture
+def client():
+    with tempfile.TemporaryDirectory() as directory:
+        settings = replace(get_settings(), database_url=f"sqlite:///{directory}/drafts.db", migrate_on_startup=True)
+        with TestClient(create_app(settings)) as test_client:
+            yield test_client
+
+
+@pytest.fixture
+def auth(client):
+    credentials = {"email": "writer@example.com", "password": "12345"}
+    client.post("/auth/signup", json={**credentials, "first_name": "Ada", "last_name": "Writer"})
+    response = client.post("/auth/login", json=credentials)
+    return {"Authorization": f"Bearer {response.json()['results']['access_token']}"}
+
+
+@pytest.fixture
+def stalled_model(monkeypatch):
+    """Keeps every job running until it is cancelled."""
+    async def generate(job):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(draft_manager, "_generate", generate)
+
+
+def _job(client, auth, job_id: int, wait: float = 0) -> dict:
+    response = client.get(f"/llm/drafts/{job_id}", params={"wait": wait}, headers=auth)
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_draft_runs_to_completion(client, auth):
+    created = client.post("/llm/drafts", json={**DRAFT, "save_as_blog": True}, headers=auth)
+    assert created.status_code == 202
+    assert created.json()["results"]["status"] == "pending"
+
+    job = _job(client, auth, created.json()["results"]["id"], wait=10)
+    assert job["status"] == "succeeded"
+    assert job["content"]
+    blog = client.get(f"/blogs/blog/{job['blog_id']}", headers=auth)
+    assert blog.json()["results"]["content"] == job["content"]
+
+
+def test_cancel_stops_a_running_draft(client, auth, stalled_model):
+    job_id = client.post("/llm/drafts", json=DRAFT, headers=auth).json()["results"]["id"]
+    assert _job(client, auth, job_id, wait=0.5)["status"] == "running"
+
+    cancelled = client.post(f"/llm/drafts/{job_id}/cancel", headers=auth)
+    assert cancelled.status_code == 200
+    assert cancelled.json()["results"]["status"] == "cancelled"
+    assert _job(client, auth, job_id)["status"] == "cancelled"
+
+
+def test_active_drafts_are_capped_per_user(client, auth, stalled_model):
+    job_ids = [client.post("/llm/drafts", json=DRAFT, headers=auth).json()["results"]["id"]
+               for _ in range(draft_manager.max_active_per_user)]
+
+    over = client.post("/llm/drafts", json=DRAFT, headers=auth)
+    assert over.status_code == 429
+
+    # A finished job frees its place
+    client.post(f"/llm/drafts/{job_ids[0]}/cancel", headers=auth)
+    assert client.post("/llm/drafts", json=DRAFT, headers=auth).status_code == 202
+
+
+def test_cap_holds_for_concurrent_submissions(client, auth, stalled_model):
+    with client.app.state.database.SessionLocal() as db:
+        user_id = db.query(User.id).filter(User.email == "writer@example.com").scalar()
+
+    def submit(_):
+        try:
+            return draft_manager._create(user_id, "Topic", ["point"], False).id
+        except DraftLimitExceededError:
+            return None
+
+    with ThreadPoolExecutor(8) as pool:
+        created = [job_id for job_id in pool.map(submit, range(8)) if job_id is not None]
+    assert len(created) == draft_manager.max_active_per_user
+
+
+def test_stale_running_draft_is_recovered(client, auth, stalled_model):
+    job_id = client.post("/llm/drafts", json=DRAFT, headers=auth).json()["results"]["id"]
+    assert _job(client, auth, job_id, wait=0.5)["status"] == "running"
+    assert draft_manager._recover(False) == []
+
+    # As if the worker running it died long ago
+    with client.app.state.database.SessionLocal() as db:
+        db.execute(update(DraftJob).where(DraftJob.id == job_id).values(updated_at=datetime(2000, 1, 1)))
+        db.commit()
+    assert draft_manager._recover(False) == [job_id]
+    assert _job(client, auth, job_id)["status"] == "pending"
+
+
+def test_full_queue_is_unavailable(client, auth, monkeypatch):
+    monkeypatch.setattr(draft_manager, "queue_max_size", 0)
+
+    response = client.post("/llm/drafts", json=DRAFT, headers=auth)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
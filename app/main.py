@@ -1,41 +1,107 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
-from app.auth import model as auth_models
 from app.auth import routes as auth_routes
-from app.blog import model as blog_models
+from app.auth.blacklist import blacklist_purger
 from app.blog import routes as blog_routes
+from app.blog.search import BlogSearchIndex
+from app.internal import routes as internal_routes
 from app.llm import routes as llm_routes
-from app.database import engine
+from app.llm.cache import response_cache
+from app.llm.client import llm_client
+from app.llm.drafts import draft_manager
+from app.llm.similarity import similarity_index
+from app.database import Database
+from app.db_replica import StickyReadsMiddleware
 from app.exceptions import register_exception_handlers
+from app.metrics import MetricsMiddleware, registry
+from app.migrations import upgrade
+from app.profiler import slow_request_profiler
+from app.scrape import routes as scrape_routes
+from app.scrape.metadata import link_previewer
+from app.security import password_hasher
+from app.settings import Settings, get_settings
+from app.token_revocation import revocation_list
 from fastapi.middleware.cors import CORSMiddleware
 
-try:
-    auth_models.Base.metadata.create_all(bind=engine)
-    blog_models.Base.metadata.create_all(bind=engine)
-except Exception as e:
-    import traceback
-
-    print("Error during table creation:")
-    traceback.print_exc()
-
-    print("Error during table creation:")
-    traceback.print_exc()
-
-app = FastAPI(title="Blog API with Supabase", version="0.1.0", debug=True)
-origins = [
-    "http://localhost:3000",
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-register_exception_handlers(app)
-
-# include routers
-app.include_router(auth_routes.router)
-app.include_router(blog_routes.router)
-app.include_router(llm_routes.router)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database: Database = app.state.database
+    if app.state.settings.migrate_on_startup:
+        for number, name in await run_in_threadpool(upgrade, database.engine):
+            logger.info("Applied migration %s: %s", number, name)
+    await revocation_list.start(database.SessionLocal)
+    blacklist_purger.start(database.SessionLocal)
+    # One pooled LLM client per worker, reused by every request
+    await llm_client.start()
+    similarity_index.load()
+    await draft_manager.start(database.SessionLocal)
+    await link_previewer.start()
+    app.state.ready = True
+    yield
+    # Fail readiness first, so the load balancer stops routing here while requests drain
+    app.state.ready = False
+    await link_previewer.close()
+    await draft_manager.close()
+    similarity_index.save()
+    await llm_client.close()
+    await response_cache.close()
+    await revocation_list.close()
+    await blacklist_purger.close()
+    password_hasher.close()
+    await database.dispose()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Builds the application; importing this module does no I/O, the lifespan does the startup work.
+
+    `settings` configures this app's database (engines, sessions, replica routing, the fallback
+    search index), migrations on startup, CORS, debug and metrics. The services the routes share
+    (LLM client, scheduler and batcher, response and similarity caches, draft jobs, link previews,
+    password hashing) are process-wide singletons configured from `get_settings()` when their
+    module is imported, so every app in a process shares them.
+    """
+    settings = settings or get_settings()
+    app = FastAPI(title="Blog API with Supabase", version="0.1.0", debug=settings.debug, lifespan=lifespan)
+    app.state.settings = settings
+    app.state.database = Database(settings)
+    # Holds this database's rows, so it belongs to the app rather than the process
+    app.state.search_index = BlogSearchIndex(settings.search_index_sync_seconds)
+    app.state.ready = False
+    app.state.schema_current = False
+    registry.register_collector("database", app.state.database.stats)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if app.state.database.replica_router.enabled:
+        app.add_middleware(StickyReadsMiddleware, sticky_seconds=settings.db_replica_sticky_seconds)
+    if settings.metrics_enabled:
+        # Added last, so it is the outermost layer and times the whole stack
+        app.add_middleware(MetricsMiddleware, profiler=slow_request_profiler)
+    register_exception_handlers(app)
+
+    # include routers
+    app.include_router(auth_routes.router)
+    app.include_router(blog_routes.router)
+    app.include_router(llm_routes.router)
+    app.include_router(scrape_routes.router)
+    app.include_router(internal_routes.router)
+    app.include_router(internal_routes.health_router)
+    if settings.metrics_enabled:
+        app.include_router(internal_routes.metrics_router)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,327 @@
+"""
+In-process metrics in the Prometheus text format, served on GET /metrics.
+
+Counters, gauges and histograms are kept in plain dicts keyed by label values; the
+`MetricsMiddleware` times every request against its route template and the SQLAlchemy hooks
+below attribute query count and time (and pool waits) to the request that issued them.
+Component `stats()` dicts (LLM cache, scheduler, principal cache, pools, replica) are read
+at scrape time through registered collectors.
+"""
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+METRICS_ENABLED = settings.metrics_enabled
+METRICS_PREFIX = settings.metrics_prefix
+METRICS_TOKEN = settings.metrics_token
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items)
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._metrics: list[_Metric] = []
+        self._collectors: dict[str, callable] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(f"{self.prefix}_{name}", documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(f"{self.prefix}_{name}", documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{self.prefix}_{name}", documentation, labels, buckets))
+
+    def register_collector(self, component: str, stats):
+        """`stats()` is called on every scrape; its numeric values become `<prefix>_<component>_<key>` gauges."""
+        self._collectors[component] = stats
+
+    def _collect(self) -> list[str]:
+        lines = []
+        for component, stats in self._collectors.items():
+            try:
+                values = stats()
+            except Exception:
+                logger.exception("Metrics collector %s failed", component)
+                continue
+            for key, value in _flatten(values):
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.prefix}_{component}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._collect())
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(values: dict, prefix: str = ""):
+    for key, value in (values or {}).items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}_")
+        elif isinstance(value, bool):
+            yield f"{prefix}{key}", int(value)
+        elif isinstance(value, (int, float)):
+            yield f"{prefix}{key}", value
+
+
+registry = MetricsRegistry(METRICS_PREFIX)
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template.", ("method", "route", "status"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests being served, by route template.", ("method", "route"))
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements issued per request.", ("route",), COUNT_BUCKETS)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.", ("route",))
+http_request_pool_wait_seconds = registry.histogram(
+    "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request.", ("route",))
+db_queries = registry.counter("db_queries_total", "SQL statements executed.")
+db_query_duration = registry.histogram("db_query_duration_seconds", "SQL statement latency.")
+db_pool_wait = registry.histogram("db_pool_wait_seconds", "Connection checkout wait.")
+response_render_duration = registry.histogram("response_render_seconds", "JSON body encoding time.")
+password_hash_duration = registry.histogram(
+    "password_hash_seconds", "bcrypt work including its queue wait.", ("operation",))
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds", "LLM provider call latency per attempt.", ("provider", "operation", "outcome"))
+llm_tokens = registry.counter("llm_tokens_total", "Tokens reported by the provider.", ("provider", "kind"))
+llm_request_tokens = registry.histogram(
+    "llm_request_tokens", "Tokens per completion.", ("provider", "kind"), TOKEN_BUCKETS)
+llm_errors = registry.counter("llm_errors_total", "Failed LLM provider calls by error class.", ("provider", "error"))
+
+
+class RequestStats:
+    __slots__ = ("route", "queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+# Copied into threadpool workers with the rest of the context, so sync DB work is attributed too
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def record_pool_wait(seconds: float):
+    if not METRICS_ENABLED:
+        return
+    db_pool_wait.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    db_queries.inc()
+    db_query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+if METRICS_ENABLED:
+    # On the Engine class, so the sync, async and replica engines are all covered
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def llm_error_class(status_code: int | None) -> str:
+    if status_code is None:
+        return "transport"
+    if status_code == 429:
+        return "rate_limited"
+    return "server_error" if status_code >= 500 else "client_error"
+
+
+def record_llm_call(provider: str, operation: str, seconds: float, error: str | None = None,
+                    prompt_tokens: int | None = None, completion_tokens: int | None = None):
+    if not METRICS_ENABLED:
+        return
+    llm_request_duration.observe(seconds, provider, operation, error or "ok")
+    if error is not None:
+        llm_errors.inc(provider, error)
+    for kind, tokens in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if tokens is not None:
+            llm_tokens.inc(provider, kind, amount=tokens)
+            llm_request_tokens.observe(tokens, provider, kind)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: resolves the route template up front (ids in paths would explode
+    label cardinality), then records latency, in-flight count and the request's DB usage.
+    """
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    def _route_template(self, scope) -> str:
+        partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+            if match is Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        stats = RequestStats(route)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method, route)
+        if self.profiler is not None:
+            self.profiler.request_started()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            http_requests_in_flight.dec(method, route)
+            http_request_duration.observe(elapsed, method, route, status_code)
+            http_request_db_queries.observe(stats.queries, route)
+            http_request_db_seconds.observe(stats.db_seconds, route)
+            http_request_pool_wait_seconds.observe(stats.pool_wait_seconds, route)
+            if self.profiler is not None:
+                await self.profiler.request_finished(method, route, started, elapsed)
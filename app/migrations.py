@@ -0,0 +1,122 @@
+"""
+Versioned schema migrations, applied once per deploy rather than by every worker at import.
+
+Each migration runs once, in order, and is recorded in `schema_migrations`. All of them are
+idempotent, so a database created before this table existed is brought under version control
+by simply upgrading it. On Postgres an advisory lock keeps two deploy jobs from racing.
+
+    python -m app.migrations status
+    python -m app.migrations upgrade
+"""
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.auth import model as auth_models  # noqa: F401
+from app.auth.blacklist import migrate_legacy_rows
+from app.blog import model as blog_models
+from app.blog.search import ensure_search_schema
+from app.database import Base
+from app.llm import model as llm_models  # noqa: F401
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary, fixed key for pg_advisory_lock
+_LOCK_KEY = 7_142_023
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def _create_tables(bind: Engine):
+    # The model modules are imported above so their tables are registered on Base
+    Base.metadata.create_all(bind=bind)
+    # create_all leaves tables that already exist alone, including indexes added to them later
+    for index in blog_models.Blog.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+def _hash_blacklisted_tokens(bind: Engine):
+    with Session(bind) as db:
+        migrate_legacy_rows(db)
+
+
+def _add_blog_version(bind: Engine):
+    # Databases created by migration 1 after the column was added to the model already have it
+    if "version" in {column["name"] for column in inspect(bind).get_columns("blogs")}:
+        return
+    with bind.begin() as connection:
+        connection.execute(text("ALTER TABLE blogs ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+MIGRATIONS = [
+    (1, "create tables and blog indexes", _create_tables),
+    (2, "hash blacklisted tokens", _hash_blacklisted_tokens),
+    (3, "blog full-text search column", ensure_search_schema),
+    (4, "blog version column", _add_blog_version),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(bind: Engine) -> int:
+    """Highest applied version; 0 for a database that has never been migrated."""
+    if not inspect(bind).has_table(schema_migrations.name):
+        return 0
+    with bind.connect() as connection:
+        return connection.execute(select(schema_migrations.c.version).order_by(
+            schema_migrations.c.version.desc()).limit(1)).scalar() or 0
+
+
+def upgrade(bind: Engine) -> list[tuple[int, str]]:
+    """Applies every pending migration in order; returns the (version, name) pairs applied."""
+    applied = []
+    with bind.connect() as lock:
+        if bind.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            schema_migrations.create(bind=bind, checkfirst=True)
+            # Read under the lock: another job may have migrated while this one waited
+            version = current_version(bind)
+            for number, name, migrate in MIGRATIONS:
+                if number <= version:
+                    continue
+                migrate(bind)
+                with bind.begin() as connection:
+                    connection.execute(schema_migrations.insert().values(
+                        version=number, name=name, applied_at=datetime.now(timezone.utc)))
+                applied.append((number, name))
+        finally:
+            if bind.dialect.name == "postgresql":
+                lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+                lock.commit()
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    bind = create_engine(get_settings().database_url)
+    if args.command == "upgrade":
+        for number, name in upgrade(bind):
+            logger.info("Applied %s: %s", number, name)
+    version = current_version(bind)
+    pending = [f"{number}: {name}" for number, name, _ in MIGRATIONS if number > version]
+    logger.info("Schema version %s of %s.", version, LATEST_VERSION)
+    for migration in pending:
+        logger.info("Pending %s", migration)
+
+
+if __name__ == "__main__":
+    main()
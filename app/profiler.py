@@ -0,0 +1,128 @@
+"""
+Opt-in sampling profiler for slow requests (PROFILE_SLOW_REQUESTS_MS > 0).
+
+While any request is in flight a daemon thread samples the stacks of every thread (event loop,
+request threadpool, password hashing pool) every PROFILE_SAMPLE_INTERVAL_MS. When a request
+takes longer than the threshold, the samples taken during it are written to PROFILE_DIR in
+the folded format (`thread;frame;frame count`) that flamegraph.pl and speedscope read.
+Requests run concurrently on one loop, so a dump shows everything the process did meanwhile.
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PROFILE_SLOW_REQUESTS_MS = settings.profile_slow_requests_ms
+PROFILE_SAMPLE_INTERVAL_MS = settings.profile_sample_interval_ms
+PROFILE_DIR = settings.profile_dir
+PROFILE_MAX_DUMPS = settings.profile_max_dumps
+
+# Leaf frames (file, function) of threads that are parked rather than working
+_IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker"),
+})
+
+
+def _folded_stack(frame) -> str | None:
+    if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES:
+        return None
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms: float, interval_ms: float, directory: str, max_dumps: int):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.dumps = 0
+        self._written: deque[str] = deque()
+        self._dump_lock = threading.Lock()
+        self._max_dumps = max_dumps
+        # (perf_counter time, folded stack); enough history for a request 60s long
+        self._samples: deque[tuple[float, str]] = deque(maxlen=int(60 / self.interval) * 8)
+        self._in_flight = 0
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def request_started(self):
+        self._in_flight += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    async def request_finished(self, method: str, route: str, started: float, elapsed: float):
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self._wake.clear()
+        if elapsed < self.threshold:
+            return
+        # Counting the samples and writing the file must not stall the other requests on the loop
+        await asyncio.to_thread(self._dump, method, route, started, elapsed)
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while True:
+            self._wake.wait()
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _folded_stack(frame)
+                if stack is None:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                # Interned: the same few stacks repeat across thousands of samples
+                self._samples.append((now, sys.intern(f"{names.get(ident, ident)};{stack}")))
+            time.sleep(self.interval)
+
+    def _dump(self, method: str, route: str, started: float, elapsed: float):
+        stacks = Counter(stack for at, stack in list(self._samples) if started <= at <= started + elapsed)
+        if not stacks:
+            return
+        # Slow requests finishing together dump from several threads; one at a time keeps the pruning right
+        with self._dump_lock:
+            self._write(method, route, elapsed, stacks)
+
+    def _write(self, method: str, route: str, elapsed: float, stacks: Counter):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^a-zA-Z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{elapsed * 1000:.0f}ms.folded")
+        try:
+            with open(path, "w") as output:
+                output.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        except OSError:
+            logger.exception("Could not write request profile")
+            return
+        self.dumps += 1
+        self._written.append(path)
+        while len(self._written) > self._max_dumps:
+            try:
+                os.remove(self._written.popleft())
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {"threshold_ms": self.threshold * 1000, "samples": len(self._samples), "dumps": self.dumps}
+
+
+slow_request_profiler = SlowRequestProfiler(
+    PROFILE_SLOW_REQUESTS_MS, PROFILE_SAMPLE_INTERVAL_MS, PROFILE_DIR, PROFILE_MAX_DUMPS,
+) if PROFILE_SLOW_REQUESTS_MS > 0 else None
@@ -0,0 +1,327 @@
+"""
+Link preview metadata (title, description, image) for URLs in blog content.
+
+Pages are fetched concurrently through one pooled httpx client, bounded overall
+(SCRAPE_MAX_CONCURRENCY) and per host (SCRAPE_MAX_PER_HOST), each within SCRAPE_TIMEOUT_SECONDS
+and SCRAPE_MAX_BYTES. The HTML is parsed as it arrives and the download stops at `</head>`.
+Results are cached for SCRAPE_CACHE_TTL_SECONDS, failures for SCRAPE_NEGATIVE_TTL_SECONDS, and
+concurrent lookups of one URL share a single fetch.
+Redirects are followed one hop at a time; unless SCRAPE_ALLOW_PRIVATE_HOSTS is set, each hop's host
+is resolved once, must be publicly reachable, and is connected to at that checked address.
+"""
+import asyncio
+import codecs
+import hashlib
+import ipaddress
+import json
+import logging
+import re
+import socket
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from app.llm.cache import InMemoryCacheBackend, RedisCacheBackend, ResponseCache
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SCRAPE_MAX_CONCURRENCY = settings.scrape_max_concurrency
+SCRAPE_MAX_PER_HOST = settings.scrape_max_per_host
+SCRAPE_TIMEOUT_SECONDS = settings.scrape_timeout_seconds
+SCRAPE_MAX_BYTES = settings.scrape_max_bytes
+SCRAPE_MAX_REDIRECTS = settings.scrape_max_redirects
+SCRAPE_MAX_URLS = settings.scrape_max_urls
+SCRAPE_USER_AGENT = settings.scrape_user_agent
+SCRAPE_CACHE_BACKEND = settings.scrape_cache_backend
+SCRAPE_CACHE_TTL_SECONDS = settings.scrape_cache_ttl_seconds
+SCRAPE_NEGATIVE_TTL_SECONDS = settings.scrape_negative_ttl_seconds
+SCRAPE_CACHE_MAX_ENTRIES = settings.scrape_cache_max_entries
+SCRAPE_CACHE_MAX_BYTES = settings.scrape_cache_max_bytes
+SCRAPE_CACHE_REDIS_URL = settings.scrape_cache_redis_url
+SCRAPE_ENRICH_ON_SAVE = settings.scrape_enrich_on_save
+SCRAPE_MAX_PENDING_ENRICHMENTS = settings.scrape_max_pending_enrichments
+SCRAPE_ALLOW_PRIVATE_HOSTS = settings.scrape_allow_private_hosts
+
+_URL_RE = re.compile(r"https?://[^\s<>\"'()\[\]{}]+", re.IGNORECASE)
+_TEXT_LIMITS = {"title": 300, "description": 1000, "site_name": 200}
+
+
+def extract_urls(content: str, limit: int = SCRAPE_MAX_URLS) -> list[str]:
+    """Distinct http(s) URLs in `content`, in order of appearance, at most `limit`."""
+    urls = []
+    seen = set()
+    for match in _URL_RE.finditer(content or ""):
+        # Sentence punctuation right after a link is not part of it
+        url = match.group(0).rstrip(".,;:!?")
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+            if len(urls) >= limit:
+                break
+    return urls
+
+
+class LinkFetchError(Exception):
+    pass
+
+
+class HeadParser(HTMLParser):
+    """Collects <title> and the description/Open Graph/Twitter meta tags; `done` once the head ends."""
+
+    def __init__(self):
+        super().__init__()
+        self.done = False
+        self.meta: dict[str, str] = {}
+        self._title: list[str] | None = None
+        self.title: str | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._title = []
+        elif tag == "meta":
+            attributes = dict(attrs)
+            name = (attributes.get("property") or attributes.get("name") or "").lower()
+            content = attributes.get("content")
+            if name and content and name not in self.meta:
+                self.meta[name] = content.strip()
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title is not None:
+            self.title = "".join(self._title).strip()
+            self._title = None
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._title is not None:
+            self._title.append(data)
+
+    def metadata(self, base_url: str) -> dict:
+        meta = self.meta
+        image = meta.get("og:image") or meta.get("og:image:url") or meta.get("twitter:image")
+        values = {
+            "title": meta.get("og:title") or meta.get("twitter:title") or self.title,
+            "description": meta.get("og:description") or meta.get("description") or meta.get("twitter:description"),
+            "site_name": meta.get("og:site_name"),
+        }
+        values = {key: " ".join(value.split())[:_TEXT_LIMITS[key]] if value else None for key, value in values.items()}
+        values["image"] = urljoin(base_url, image) if image else None
+        return values
+
+
+def _cache_key(url: str) -> str:
+    return "scrape:meta:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, (TimeoutError, httpx.TimeoutException)):
+        return "timed out"
+    if isinstance(exc, httpx.InvalidURL):
+        return "invalid URL"
+    if isinstance(exc, httpx.HTTPError):
+        return f"fetch failed: {exc.__class__.__name__}"
+    return str(exc) or exc.__class__.__name__
+
+
+async def _resolve_public_host(host: str) -> str:
+    """An address for `host`, provided every address it resolves to is publicly reachable."""
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except OSError:
+        raise LinkFetchError("host not found") from None
+    for address in addresses:
+        if not ipaddress.ip_address(address[4][0]).is_global:
+            raise LinkFetchError("host is not publicly reachable")
+    return addresses[0][4][0]
+
+
+class LinkPreviewer:
+    def __init__(self, cache: ResponseCache, max_concurrency: int, max_per_host: int, timeout: float, max_bytes: int):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.fetches = 0
+        self.failures = 0
+        self.bytes_read = 0
+        self.enrichments_dropped = 0
+        self._client: httpx.AsyncClient | None = None
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # host -> [semaphore, lookups holding or waiting for it]; dropped when idle
+        self._hosts: dict[str, list] = {}
+        self._enrichments: set[asyncio.Task] = set()
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                timeout=self.timeout,
+                headers={"User-Agent": SCRAPE_USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.1"},
+            )
+
+    async def close(self):
+        for task in list(self._enrichments):
+            task.cancel()
+        await asyncio.gather(*self._enrichments, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        await self.cache.close()
+
+    async def lookup(self, url: str) -> dict:
+        """Preview metadata for `url`; failures come back with `error` set rather than raising."""
+        value = await self.cache.get_or_compute(
+            _cache_key(url), lambda: self._fetch(url),
+            ttl_for=lambda cached: SCRAPE_NEGATIVE_TTL_SECONDS if json.loads(cached)["error"] else SCRAPE_CACHE_TTL_SECONDS,
+        )
+        return json.loads(value)
+
+    async def lookup_many(self, urls: list[str]) -> list[dict]:
+        # All at once: the slots below bound how many actually fetch
+        return list(await asyncio.gather(*(self.lookup(url) for url in urls)))
+
+    def enrich(self, content: str):
+        """Warms the cache for the links in saved blog content without holding up the response."""
+        urls = extract_urls(content)
+        if not SCRAPE_ENRICH_ON_SAVE or not urls or self._client is None:
+            return
+        if len(self._enrichments) >= SCRAPE_MAX_PENDING_ENRICHMENTS:
+            self.enrichments_dropped += 1
+            return
+        task = asyncio.create_task(self._enrich(urls))
+        self._enrichments.add(task)
+        task.add_done_callback(self._enrichments.discard)
+
+    async def _enrich(self, urls: list[str]):
+        try:
+            await self.lookup_many(urls)
+        except Exception:
+            logger.exception("Link enrichment failed")
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.max_per_host), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._hosts[host]
+
+    async def _fetch(self, url: str) -> str:
+        if self._client is None:
+            raise RuntimeError("LinkPreviewer.start() was not awaited")
+        self.fetches += 1
+        result = {"url": url, "final_url": None, "content_type": None, "title": None, "description": None,
+                  "image": None, "site_name": None, "error": None}
+        try:
+            result.update(await self._fetch_head(url))
+        except (LinkFetchError, httpx.HTTPError, httpx.InvalidURL, TimeoutError, ValueError) as exc:
+            self.failures += 1
+            result["error"] = _describe(exc)
+        return json.dumps(result)
+
+    async def _fetch_head(self, url: str) -> dict:
+        loop = asyncio.get_running_loop()
+        deadline = None
+        current = url
+        for _ in range(SCRAPE_MAX_REDIRECTS + 1):
+            parts = urlsplit(current)
+            if parts.scheme not in ("http", "https") or not parts.hostname:
+                raise LinkFetchError("unsupported URL")
+            # Every hop is checked and takes its own host's slot: a public page may redirect to an
+            # internal one, or to a host other lookups are already busy with. Host slot first:
+            # waiting on a busy host must not hold a slot other hosts could use.
+            async with self._host_slot(parts.hostname), self._slots:
+                # The timeout covers the whole chain, from the first slot on; queueing for it is free
+                if deadline is None:
+                    deadline = loop.time() + self.timeout
+                result, location = await asyncio.wait_for(self._fetch_hop(current), timeout=deadline - loop.time())
+            if location is None:
+                return result
+            current = urljoin(current, location)
+        raise LinkFetchError("too many redirects")
+
+    async def _fetch_hop(self, url: str) -> tuple[dict | None, str | None]:
+        """The metadata of `url`, or where it redirects to."""
+        response = await self._client.send(await self._build_request(url), stream=True)
+        try:
+            if response.is_redirect:
+                return None, response.headers.get("location", "")
+            if response.status_code >= 400:
+                raise LinkFetchError(f"HTTP {response.status_code}")
+            return await self._read_head(response, url), None
+        finally:
+            await response.aclose()
+
+    async def _build_request(self, url: str) -> httpx.Request:
+        target = httpx.URL(url)
+        if SCRAPE_ALLOW_PRIVATE_HOSTS:
+            return self._client.build_request("GET", target)
+        # Connect to the address that was checked, so a second lookup cannot rebind the name to an
+        # internal one; the name still goes out as the Host header and in TLS (SNI and certificate)
+        host = target.raw_host.decode("ascii")
+        address = await _resolve_public_host(host)
+        return self._client.build_request("GET", target.copy_with(host=address),
+                                          headers={"Host": target.netloc.decode("ascii")},
+                                          extensions={"sni_hostname": host})
+
+    async def _read_head(self, response: httpx.Response, final_url: str) -> dict:
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        result = {"final_url": final_url, "content_type": content_type or None}
+        if content_type not in ("text/html", "application/xhtml+xml", ""):
+            return result
+
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parser = HeadParser()
+        received = 0
+        async for chunk in response.aiter_bytes():
+            chunk = chunk[:self.max_bytes - received]
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or received >= self.max_bytes:
+                break
+        self.bytes_read += received
+        result.update(parser.metadata(final_url))
+        return result
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "backend": SCRAPE_CACHE_BACKEND,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "bytes_read": self.bytes_read,
+            "hosts_in_flight": len(self._hosts),
+            "pending_enrichments": len(self._enrichments),
+            "enrichments_dropped": self.enrichments_dropped,
+        }
+
+
+def _build_cache() -> ResponseCache:
+    if SCRAPE_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(SCRAPE_CACHE_REDIS_URL)
+    elif SCRAPE_CACHE_BACKEND == "memory":
+        backend = InMemoryCacheBackend(SCRAPE_CACHE_MAX_ENTRIES, SCRAPE_CACHE_MAX_BYTES)
+    else:
+        backend = None
+    return ResponseCache(backend, SCRAPE_CACHE_TTL_SECONDS)
+
+
+link_previewer = LinkPreviewer(_build_cache(), SCRAPE_MAX_CONCURRENCY, SCRAPE_MAX_PER_HOST, SCRAPE_TIMEOUT_SECONDS,
+                               SCRAPE_MAX_BYTES)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import TypeAdapter
+
+from app.auth.principal import Principal
+from app.auth_util import get_current_user
+from app.global_constants import ErrorMessage, SuccessMessage
+from app.scrape.metadata import SCRAPE_MAX_URLS, link_previewer
+from app.scrape.schema import LinkMetadataList
+from app.utils import get_response_schema
+
+router = APIRouter(prefix="/scrape", tags=["Scrape"])
+
+link_list_adapter = TypeAdapter(LinkMetadataList)
+
+
+@router.get("/metadata", response_model=LinkMetadataList)
+async def link_metadata(url: list[str] = Query(..., min_length=1), current_user: Principal = Depends(get_current_user)):
+    urls = list(dict.fromkeys(url))
+    if len(urls) > SCRAPE_MAX_URLS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=ErrorMessage.TOO_MANY_URLS.value)
+    items = await link_previewer.lookup_many(urls)
+    return get_response_schema({"items": items}, SuccessMessage.RECORD_RETRIEVED.value, status.HTTP_200_OK,
+                               adapter=link_list_adapter)
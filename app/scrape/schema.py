@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class LinkMetadata(BaseModel):
+    url: str
+    final_url: str | None = None
+    content_type: str | None = None
+    title: str | None = None
+    description: str | None = None
+    image: str | None = None
+    site_name: str | None = None
+    # Set instead of the fields above when the page could not be fetched
+    error: str | None = None
+
+
+class LinkMetadataList(BaseModel):
+    items: list[LinkMetadata]
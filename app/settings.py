@@ -0,0 +1,284 @@
+"""
+Process-wide configuration, read from the environment (and `.env`) once.
+
+`get_settings()` is cached: the first call loads `.env` and builds the settings, later calls
+return the same object. Every knob lives here; modules read the attributes they need at import,
+so their singletons are configured once per process. `app.main.create_app` takes a `Settings`
+for the per-app parts (database, search index, CORS, metrics), so tests can build an app on their own database
+(`dataclasses.replace(get_settings(), database_url=...)`).
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    # Optional read replica for GET routes and the principal lookup
+    database_replica_url: str | None
+    # sync: request sessions run each statement in the threadpool; async: AsyncSession on asyncpg/aiosqlite
+    db_mode: str
+    secret_key: str | None
+    cors_origins: tuple[str, ...]
+    debug: bool
+    # Apply pending migrations in the lifespan; for local development, deploys run `python -m app.migrations`
+    migrate_on_startup: bool
+
+    # Connection pools
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    # Close connections before the server or a pooler in front of it drops them for idling
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    # session: direct or session-mode pooler; transaction: PgBouncer-style transaction pooler (Supabase port 6543).
+    # psycopg2 never prepares statements server-side, so only the async driver needs adjusting.
+    db_pooler_mode: str
+    # A client reads from the primary this long after its last write (read-your-writes)
+    db_replica_sticky_seconds: float
+    # After a replica failure, reads stay on the primary this long before trying it again
+    db_replica_retry_seconds: float
+
+    # Authentication
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_queue_limit: int
+    principal_cache_ttl_seconds: float
+    principal_cache_max_entries: int
+    blacklist_purge_interval_seconds: float
+    blacklist_purge_batch_size: int
+    revocation_sync_interval_seconds: float
+    # Re-read this much history on every poll so rows committed late by another worker are not missed
+    revocation_sync_overlap_seconds: float
+
+    # Observability
+    metrics_enabled: bool
+    metrics_prefix: str
+    # When set, scrapers must send `Authorization: Bearer <METRICS_TOKEN>`
+    metrics_token: str | None
+    profile_slow_requests_ms: float
+    profile_sample_interval_ms: float
+    profile_dir: str
+    profile_max_dumps: int
+
+    # Blogs
+    blog_page_default_size: int
+    blog_page_max_size: int
+    blog_excerpt_chars: int
+    blog_bulk_max_items: int
+    blog_export_batch_size: int
+    blog_import_batch_size: int
+    blog_import_max_line_bytes: int
+    search_query_max_chars: int
+    search_language: str
+    search_snippet_words: int
+    # Fallback index only: how stale it may get before a search re-reads recently updated rows
+    search_index_sync_seconds: float
+
+    # LLM client
+    llm_provider: str  # groq | fake
+    llm_model: str
+    llm_timeout_seconds: float
+    llm_max_retries: int
+    llm_backoff_base_seconds: float
+    llm_backoff_max_seconds: float
+    llm_max_connections: int
+    groq_api_key: str | None
+    max_context_tokens: int  # completion budget per topic request
+    fake_llm_seed: int | None
+    fake_llm_latency_distribution: str  # fixed | uniform | normal | lognormal
+    fake_llm_latency_seconds: float
+    fake_llm_latency_jitter_seconds: float
+    fake_llm_tokens_per_second: float
+    fake_llm_error_rate: float
+    fake_llm_rate_limit_rate: float
+    fake_llm_max_concurrency: int
+    fake_llm_requests_per_minute: int
+
+    # LLM scheduling, caching and drafts
+    llm_max_concurrency: int
+    llm_requests_per_minute: int
+    llm_tokens_per_minute: int
+    llm_queue_max_size: int
+    llm_queue_max_wait_seconds: float
+    llm_batch_window_ms: float
+    llm_batch_max_size: int
+    # Only keyword lists this short are worth sharing a prompt with other requests
+    llm_batch_max_keywords: int
+    llm_cache_backend: str  # memory | redis | none
+    llm_cache_ttl_seconds: float
+    llm_cache_max_entries: int
+    llm_cache_max_bytes: int
+    llm_cache_redis_url: str
+    llm_similarity_enabled: bool
+    llm_similarity_threshold: float
+    # Every keyword must also pair up with one of the candidate's at this similarity, so a set with
+    # an extra or a different keyword never reuses the answer for a smaller or other set
+    llm_similarity_keyword_threshold: float
+    llm_similarity_max_entries: int
+    llm_similarity_index_path: str
+    draft_workers: int
+    draft_queue_max_size: int
+    draft_max_active_per_user: int
+    draft_max_completion_tokens: int
+    draft_timeout_seconds: float
+    draft_stale_after_seconds: float
+    # How often each worker looks for jobs a dead worker left behind
+    draft_recover_interval_seconds: float
+    draft_long_poll_max_seconds: float
+
+    # Link previews
+    scrape_max_concurrency: int
+    scrape_max_per_host: int
+    scrape_timeout_seconds: float
+    scrape_max_bytes: int
+    scrape_max_redirects: int
+    scrape_max_urls: int
+    scrape_user_agent: str
+    scrape_cache_backend: str  # memory | redis | none
+    scrape_cache_ttl_seconds: float
+    scrape_negative_ttl_seconds: float
+    scrape_cache_max_entries: int
+    scrape_cache_max_bytes: int
+    scrape_cache_redis_url: str
+    # Fetch the links of saved blogs in the background so their previews are cached by the time they are read
+    scrape_enrich_on_save: bool
+    scrape_max_pending_enrichments: int
+    # Only for local development and stub servers: URLs come from users, so by default anything
+    # resolving to a loopback, private or link-local address is refused
+    scrape_allow_private_hosts: bool
+
+
+def _env(name: str, default, cast=str):
+    value = os.getenv(name)
+    return default if value is None else cast(value)
+
+
+def _flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.lower() == "true"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL") or (
+        f"postgresql://{os.getenv('USER')}:{os.getenv('PASSWORD')}@{os.getenv('HOST')}:{os.getenv('PORT')}"
+        f"/{os.getenv('DBNAME')}?sslmode=require"
+    )
+    return Settings(
+        database_url=database_url,
+        database_replica_url=os.getenv("DATABASE_REPLICA_URL"),
+        db_mode=_env("DB_MODE", "sync"),
+        secret_key=os.getenv("SECRET_KEY"),
+        cors_origins=tuple(
+            origin.strip() for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",") if origin.strip()
+        ),
+        debug=_flag("APP_DEBUG", True),
+        migrate_on_startup=_flag("MIGRATE_ON_STARTUP", False),
+
+        db_pool_size=_env("DB_POOL_SIZE", 5, int),
+        db_max_overflow=_env("DB_MAX_OVERFLOW", 10, int),
+        db_pool_timeout=_env("DB_POOL_TIMEOUT", 30.0, float),
+        db_pool_recycle=_env("DB_POOL_RECYCLE", 1800, int),
+        db_pool_pre_ping=_flag("DB_POOL_PRE_PING", True),
+        db_pooler_mode=_env("DB_POOLER_MODE", "session"),
+        db_replica_sticky_seconds=_env("DB_REPLICA_STICKY_SECONDS", 5.0, float),
+        db_replica_retry_seconds=_env("DB_REPLICA_RETRY_SECONDS", 30.0, float),
+
+        bcrypt_rounds=_env("BCRYPT_ROUNDS", 12, int),
+        password_hash_workers=_env("PASSWORD_HASH_WORKERS", os.cpu_count() or 2, int),
+        password_hash_queue_limit=_env("PASSWORD_HASH_QUEUE_LIMIT", 64, int),
+        principal_cache_ttl_seconds=_env("PRINCIPAL_CACHE_TTL_SECONDS", 60.0, float),
+        principal_cache_max_entries=_env("PRINCIPAL_CACHE_MAX_ENTRIES", 10_000, int),
+        blacklist_purge_interval_seconds=_env("BLACKLIST_PURGE_INTERVAL_SECONDS", 300.0, float),
+        blacklist_purge_batch_size=_env("BLACKLIST_PURGE_BATCH_SIZE", 1000, int),
+        revocation_sync_interval_seconds=_env("REVOCATION_SYNC_INTERVAL_SECONDS", 2.0, float),
+        revocation_sync_overlap_seconds=_env("REVOCATION_SYNC_OVERLAP_SECONDS", 60.0, float),
+
+        metrics_enabled=_flag("METRICS_ENABLED", True),
+        metrics_prefix=_env("METRICS_PREFIX", "blog_api"),
+        metrics_token=os.getenv("METRICS_TOKEN"),
+        profile_slow_requests_ms=_env("PROFILE_SLOW_REQUESTS_MS", 0.0, float),
+        profile_sample_interval_ms=_env("PROFILE_SAMPLE_INTERVAL_MS", 5.0, float),
+        profile_dir=_env("PROFILE_DIR", "./profiles"),
+        profile_max_dumps=_env("PROFILE_MAX_DUMPS", 100, int),
+
+        blog_page_default_size=_env("BLOG_PAGE_DEFAULT_SIZE", 20, int),
+        blog_page_max_size=_env("BLOG_PAGE_MAX_SIZE", 100, int),
+        blog_excerpt_chars=_env("BLOG_EXCERPT_CHARS", 200, int),
+        blog_bulk_max_items=_env("BLOG_BULK_MAX_ITEMS", 500, int),
+        blog_export_batch_size=_env("BLOG_EXPORT_BATCH_SIZE", 500, int),
+        blog_import_batch_size=_env("BLOG_IMPORT_BATCH_SIZE", 1000, int),
+        blog_import_max_line_bytes=_env("BLOG_IMPORT_MAX_LINE_BYTES", 8 * 1024 * 1024, int),
+        search_query_max_chars=_env("SEARCH_QUERY_MAX_CHARS", 200, int),
+        search_language=_env("SEARCH_LANGUAGE", "english"),
+        search_snippet_words=_env("SEARCH_SNIPPET_WORDS", 30, int),
+        search_index_sync_seconds=_env("SEARCH_INDEX_SYNC_SECONDS", 1.0, float),
+
+        llm_provider=_env("LLM_PROVIDER", "groq"),
+        llm_model=_env("LLM_MODEL", "llama-3.1-8b-instant"),
+        llm_timeout_seconds=_env("LLM_TIMEOUT_SECONDS", 30.0, float),
+        llm_max_retries=_env("LLM_MAX_RETRIES", 3, int),
+        llm_backoff_base_seconds=_env("LLM_BACKOFF_BASE_SECONDS", 0.5, float),
+        llm_backoff_max_seconds=_env("LLM_BACKOFF_MAX_SECONDS", 8.0, float),
+        llm_max_connections=_env("LLM_MAX_CONNECTIONS", 20, int),
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        max_context_tokens=_env("MAX_CONTEXT_TOKENS", 1024, int),
+        fake_llm_seed=_env("FAKE_LLM_SEED", None, int),
+        fake_llm_latency_distribution=_env("FAKE_LLM_LATENCY_DISTRIBUTION", "fixed"),
+        fake_llm_latency_seconds=_env("FAKE_LLM_LATENCY_SECONDS", 0.05, float),
+        fake_llm_latency_jitter_seconds=_env("FAKE_LLM_LATENCY_JITTER_SECONDS", 0.0, float),
+        fake_llm_tokens_per_second=_env("FAKE_LLM_TOKENS_PER_SECOND", 0.0, float),
+        fake_llm_error_rate=_env("FAKE_LLM_ERROR_RATE", 0.0, float),
+        fake_llm_rate_limit_rate=_env("FAKE_LLM_RATE_LIMIT_RATE", 0.0, float),
+        fake_llm_max_concurrency=_env("FAKE_LLM_MAX_CONCURRENCY", 0, int),
+        fake_llm_requests_per_minute=_env("FAKE_LLM_REQUESTS_PER_MINUTE", 0, int),
+
+        llm_max_concurrency=_env("LLM_MAX_CONCURRENCY", 8, int),
+        llm_requests_per_minute=_env("LLM_REQUESTS_PER_MINUTE", 30, int),
+        llm_tokens_per_minute=_env("LLM_TOKENS_PER_MINUTE", 30_000, int),
+        llm_queue_max_size=_env("LLM_QUEUE_MAX_SIZE", 100, int),
+        llm_queue_max_wait_seconds=_env("LLM_QUEUE_MAX_WAIT_SECONDS", 10.0, float),
+        llm_batch_window_ms=_env("LLM_BATCH_WINDOW_MS", 5.0, float),
+        llm_batch_max_size=_env("LLM_BATCH_MAX_SIZE", 4, int),
+        llm_batch_max_keywords=_env("LLM_BATCH_MAX_KEYWORDS", 5, int),
+        llm_cache_backend=_env("LLM_CACHE_BACKEND", "memory"),
+        llm_cache_ttl_seconds=_env("LLM_CACHE_TTL_SECONDS", 86_400.0, float),
+        llm_cache_max_entries=_env("LLM_CACHE_MAX_ENTRIES", 10_000, int),
+        llm_cache_max_bytes=_env("LLM_CACHE_MAX_BYTES", 32 * 1024 * 1024, int),
+        llm_cache_redis_url=_env("LLM_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+        llm_similarity_enabled=_flag("LLM_SIMILARITY_ENABLED", False),
+        llm_similarity_threshold=_env("LLM_SIMILARITY_THRESHOLD", 0.85, float),
+        llm_similarity_keyword_threshold=_env("LLM_SIMILARITY_KEYWORD_THRESHOLD", 0.75, float),
+        llm_similarity_max_entries=_env("LLM_SIMILARITY_MAX_ENTRIES", 5000, int),
+        llm_similarity_index_path=_env("LLM_SIMILARITY_INDEX_PATH", ""),
+        draft_workers=_env("DRAFT_WORKERS", 4, int),
+        draft_queue_max_size=_env("DRAFT_QUEUE_MAX_SIZE", 200, int),
+        draft_max_active_per_user=_env("DRAFT_MAX_ACTIVE_PER_USER", 2, int),
+        draft_max_completion_tokens=_env("DRAFT_MAX_COMPLETION_TOKENS", 4096, int),
+        draft_timeout_seconds=_env("DRAFT_TIMEOUT_SECONDS", 120.0, float),
+        draft_stale_after_seconds=_env("DRAFT_STALE_AFTER_SECONDS", 600.0, float),
+        draft_recover_interval_seconds=_env("DRAFT_RECOVER_INTERVAL_SECONDS", 60.0, float),
+        draft_long_poll_max_seconds=_env("DRAFT_LONG_POLL_MAX_SECONDS", 30.0, float),
+
+        scrape_max_concurrency=_env("SCRAPE_MAX_CONCURRENCY", 20, int),
+        scrape_max_per_host=_env("SCRAPE_MAX_PER_HOST", 4, int),
+        scrape_timeout_seconds=_env("SCRAPE_TIMEOUT_SECONDS", 5.0, float),
+        scrape_max_bytes=_env("SCRAPE_MAX_BYTES", 512 * 1024, int),
+        scrape_max_redirects=_env("SCRAPE_MAX_REDIRECTS", 5, int),
+        scrape_max_urls=_env("SCRAPE_MAX_URLS", 100, int),
+        scrape_user_agent=_env("SCRAPE_USER_AGENT", "BlogLinkPreview/1.0"),
+        scrape_cache_backend=_env("SCRAPE_CACHE_BACKEND", "memory"),
+        scrape_cache_ttl_seconds=_env("SCRAPE_CACHE_TTL_SECONDS", 86_400.0, float),
+        scrape_negative_ttl_seconds=_env("SCRAPE_NEGATIVE_TTL_SECONDS", 600.0, float),
+        scrape_cache_max_entries=_env("SCRAPE_CACHE_MAX_ENTRIES", 50_000, int),
+        scrape_cache_max_bytes=_env("SCRAPE_CACHE_MAX_BYTES", 32 * 1024 * 1024, int),
+        scrape_cache_redis_url=_env("SCRAPE_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+        scrape_enrich_on_save=_flag("SCRAPE_ENRICH_ON_SAVE", True),
+        scrape_max_pending_enrichments=_env("SCRAPE_MAX_PENDING_ENRICHMENTS", 100, int),
+        scrape_allow_private_hosts=_flag("SCRAPE_ALLOW_PRIVATE_HOSTS", False),
+    )
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth.model import BlacklistedToken
+from app.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+REVOCATION_SYNC_INTERVAL_SECONDS = settings.revocation_sync_interval_seconds
+REVOCATION_SYNC_OVERLAP_SECONDS = settings.revocation_sync_overlap_seconds
+
+
+class RevocationList:
+    """
+    In-process set of revoked token hashes (see `jwt_utils.token_hash`) with their expiry, so access-token checks
+    normally need no database round trip. Loaded at startup and kept in sync with other
+    workers by polling `blacklisted_tokens`; entries drop out once the token itself expires.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}  # token hash -> exp timestamp
+        self._synced_until: datetime | None = None
+        self._session_factory: sessionmaker | None = None
+        self._poll_task: asyncio.Task | None = None
+        self.ready = False
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def add(self, key: str, expires_at: float):
+        self._revoked[key] = expires_at
+
+    def is_revoked(self, key: str) -> bool:
+        expires_at = self._revoked.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            self._revoked.pop(key, None)
+            return False
+        return True
+
+    def sync(self, db: Session):
+        started = datetime.utcnow()
+        query = db.query(BlacklistedToken.token_hash, BlacklistedToken.expires_at).filter(
+            BlacklistedToken.expires_at > started,
+        )
+        if self._synced_until is not None:
+            query = query.filter(
+                BlacklistedToken.created_at >= self._synced_until - timedelta(seconds=REVOCATION_SYNC_OVERLAP_SECONDS)
+            )
+
+        for key, expires_at in query.all():
+            # expires_at is stored as naive UTC
+            self.add(key, expires_at.replace(tzinfo=timezone.utc).timestamp())
+        self._synced_until = started
+        self._prune()
+        self.ready = True
+
+    def _prune(self):
+        now = time.time()
+        for key in [key for key, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[key]
+
+    def _sync_with_new_session(self):
+        with self._session_factory() as db:
+            self.sync(db)
+
+    async def start(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+        try:
+            await asyncio.to_thread(self._sync_with_new_session)
+        except Exception:
+            logger.exception("Could not load revoked tokens")
+        self._poll_task = asyncio.create_task(self._poll())
+
+    async def close(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+            self._poll_task = None
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(REVOCATION_SYNC_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self._sync_with_new_session)
+            except Exception:
+                logger.exception("Revoked token sync failed")
+
+
+revocation_list = RevocationList()
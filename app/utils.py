@@ -1,13 +1,150 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from time import perf_counter
+
+from fastapi import Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+from app.metrics import METRICS_ENABLED, response_render_duration
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same output, only slower
+    orjson = None
+
+
+def _encode_default(value):
+    # Only reached for values the encoder has no native support for
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return jsonable_encoder(value)
+
+
+def json_dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_encode_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
 
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if not METRICS_ENABLED:
+            return json_dumps(content)
+        started = perf_counter()
+        body = json_dumps(content)
+        response_render_duration.observe(perf_counter() - started)
+        return body
 
-def get_response_schema(schema: dict, message: str, status_code: int) -> JSONResponse:
-    return JSONResponse(
+
+def get_response_schema(schema, message: str, status_code: int, headers: dict | None = None,
+                        adapter: TypeAdapter | None = None) -> JSONResponse:
+    """
+    The `{message, status, results}` envelope. With `adapter` the results (ORM objects, rows or
+    dicts) are validated into the declared response model first, so only its fields go out.
+    """
+    if adapter is not None:
+        schema = adapter.dump_python(adapter.validate_python(schema, from_attributes=True))
+    elif isinstance(schema, BaseModel):
+        schema = schema.model_dump()
+    return FastJSONResponse(
         status_code=status_code,
+        headers=headers,
         content={
             "message": message,
             "status": status_code,
-            "results": jsonable_encoder(schema),
+            "results": schema,
         },
-    )
\ No newline at end of file
+    )
+
+
+def format_sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset-pagination cursor holding the sort key of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(jsonable_encoder(values)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of `encode_cursor`; raises ValueError for anything that is not one of our cursors."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (UnicodeError, json.JSONDecodeError, base64.binascii.Error) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+def make_etag(*parts) -> str:
+    """Strong entity tag over the values that identify one representation of a resource."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_list(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(header: str, etag: str, weak: bool = False) -> bool:
+    """`If-None-Match` compares weakly (a `W/` prefix is ignored); `If-Match` compares strongly."""
+    for tag in _etag_list(header):
+        if tag == "*":
+            return True
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def has_validators(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """RFC 9110 evaluation order: `If-None-Match` when present, otherwise `If-Modified-Since`."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, weak=True)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    # Clients may keep the response but must revalidate before reusing it
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: datetime | None = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
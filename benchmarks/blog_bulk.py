@@ -0,0 +1,92 @@
+"""
+Rows per second through the single-row blog endpoints vs. the /blogs/bulk endpoints, in process
+(no network), for create, update and delete.
+
+    python -m benchmarks.blog_bulk --rows 2000 --batch-size 500
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from benchmarks.scratch_db import scratch_database_url
+
+
+async def _rate(rows: int, fn) -> float:
+    started = time.perf_counter()
+    await fn()
+    return rows / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    args.database_url = scratch_database_url(args.database_url, "blog_bulk")
+
+    # get_settings() reads these once, at the first import of the app
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    import httpx
+    from app.main import app
+    from app.migrations import upgrade
+
+    upgrade(app.state.database.engine)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "benchmark-password"}
+        await client.post("/auth/signup", json={**credentials, "first_name": "Bench", "last_name": "Mark"})
+        response = await client.post("/auth/login", json=credentials)
+        headers = {"Authorization": "Bearer " + response.json()["results"]["access_token"]}
+        body = {"title": "Benchmark post", "content": "x" * 2_000}
+        batches = range(0, args.rows, args.batch_size)
+
+        single_ids, bulk_ids = [], []
+
+        async def single_create():
+            for _ in range(args.rows):
+                single_ids.append((await client.post("/blogs/blog", json=body, headers=headers)).json()["results"]["id"])
+
+        async def bulk_create():
+            for start in batches:
+                count = min(args.batch_size, args.rows - start)
+                response = await client.post("/blogs/bulk", json={"items": [body] * count}, headers=headers)
+                bulk_ids.extend(item["id"] for item in response.json()["results"]["items"])
+
+        async def single_update():
+            for blog_id in single_ids:
+                await client.put(f"/blogs/blog/{blog_id}", json=body, headers=headers)
+
+        async def bulk_update():
+            for start in batches:
+                items = [{"id": blog_id, **body} for blog_id in bulk_ids[start:start + args.batch_size]]
+                await client.put("/blogs/bulk", json={"items": items}, headers=headers)
+
+        async def single_delete():
+            for blog_id in single_ids:
+                await client.delete(f"/blogs/blog/{blog_id}", headers=headers)
+
+        async def bulk_delete():
+            for start in batches:
+                ids = bulk_ids[start:start + args.batch_size]
+                await client.request("DELETE", "/blogs/bulk", json={"ids": ids}, headers=headers)
+
+        results = []
+        for operation, single, bulk in (("create", single_create, bulk_create), ("update", single_update, bulk_update),
+                                        ("delete", single_delete, bulk_delete)):
+            results.append((operation, await _rate(args.rows, single), await _rate(args.rows, bulk)))
+    # No lifespan runs under ASGITransport; an undisposed aiosqlite engine keeps the process alive
+    await app.state.database.dispose()
+
+    print(f"{'operation':<10} {'single rows/s':>14} {'bulk rows/s':>12} {'speedup':>8}")
+    for operation, single_rate, bulk_rate in results:
+        print(f"{operation:<10} {single_rate:>14.0f} {bulk_rate:>12.0f} {bulk_rate / single_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
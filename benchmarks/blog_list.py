@@ -0,0 +1,84 @@
+"""
+Blog list latency as one user's blog count grows: the old unpaginated full-row query vs. the
+first and a deep keyset page of the projected list.
+
+    python -m benchmarks.blog_list --sizes 10 1000 100000
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.model import User
+from app.blog.model import Blog
+from app.blog.routes import blog_page_query
+from app.database import Base
+from benchmarks.scratch_db import scratch_database_url
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--content-chars", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    args.database_url = scratch_database_url(args.database_url, "blog_list")
+
+    engine = create_engine(args.database_url)
+    tables = [User.__table__, Blog.__table__]
+    print(f"{'blogs':>8} {'full list ms':>13} {'first page ms':>14} {'deep page ms':>13}")
+    for size in args.sizes:
+        Base.metadata.drop_all(bind=engine, tables=tables)
+        Base.metadata.create_all(bind=engine, tables=tables)
+        with sessionmaker(bind=engine)() as db:
+            user = User(email="bench@example.com", hashed_password="-", first_name="Bench", last_name="Mark")
+            db.add(user)
+            db.commit()
+
+            started = datetime(2024, 1, 1)
+            content = "x" * args.content_chars
+            for offset in range(0, size, 10_000):
+                db.bulk_insert_mappings(Blog, [
+                    {"user_id": user.id, "title": f"Post {i}", "content": content,
+                     "updated_at": started + timedelta(seconds=i), "created_at": started + timedelta(seconds=i)}
+                    for i in range(offset, min(size, offset + 10_000))
+                ])
+                db.commit()
+
+            def full_list():
+                db.scalars(select(Blog).filter(Blog.user_id == user.id).order_by(Blog.updated_at.desc())).all()
+
+            # Seek to roughly the middle, as a client paging deep into the list would
+            middle = db.execute(blog_page_query(user.id, 1).offset(size // 2)).one()
+
+            def first_page():
+                db.execute(blog_page_query(user.id, args.page_size + 1)).all()
+
+            def deep_page():
+                db.execute(blog_page_query(user.id, args.page_size + 1, (middle.updated_at, middle.id))).all()
+
+            print(f"{size:>8} {_median_ms(full_list, args.iterations):>13.2f} "
+                  f"{_median_ms(first_page, args.iterations):>14.2f} {_median_ms(deep_page, args.iterations):>13.2f}")
+
+    Base.metadata.drop_all(bind=engine, tables=tables)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Peak resident memory of the server while it streams a large NDJSON export of one user's blogs
+and while it imports that file back. Each phase runs in a fresh uvicorn process so the peak
+(VmHWM, Linux only) belongs to that phase alone.
+
+    python -m benchmarks.blog_transfer --size-mb 1024 --content-chars 10000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.db_modes import _wait_until_up
+from benchmarks.scratch_db import scratch_database_url
+
+
+def _memory_mb(pid: int, field: str) -> float:
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not reported for process {pid}")
+
+
+def _seed(database_url: str, user_id: int, rows: int, content_chars: int):
+    from sqlalchemy import create_engine, insert
+
+    from app.blog.model import Blog
+
+    engine = create_engine(database_url)
+    content = "lorem ipsum " * (content_chars // 12)
+    with engine.begin() as connection:
+        for start in range(0, rows, 1_000):
+            connection.execute(insert(Blog), [
+                {"user_id": user_id, "title": f"Post {i}", "content": content}
+                for i in range(start, min(rows, start + 1_000))
+            ])
+    engine.dispose()
+
+
+async def _signup(client: httpx.AsyncClient) -> tuple[int, dict]:
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "benchmark-password"}
+    await client.post("/auth/signup", json={**credentials, "first_name": "Bench", "last_name": "Mark"})
+    results = (await client.post("/auth/login", json=credentials)).json()["results"]
+    return results["user"]["id"], {"Authorization": "Bearer " + results["access_token"]}
+
+
+async def _phase(args, name: str, setup, run) -> str:
+    env = {**os.environ, "DB_MODE": args.mode, "DATABASE_URL": args.database_url, "LLM_PROVIDER": "fake",
+           "MIGRATE_ON_STARTUP": "true", "SECRET_KEY": os.getenv("SECRET_KEY", "benchmark-secret")}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=None) as client:
+            await _wait_until_up(client, process)
+            headers = await setup(client)
+            started_rss = _memory_mb(process.pid, "VmRSS")
+            started = time.perf_counter()
+            transferred = await run(client, headers)
+            elapsed = time.perf_counter() - started
+            peak_rss = _memory_mb(process.pid, "VmHWM")
+    finally:
+        process.terminate()
+        process.wait()
+    return (f"{name:<7} {transferred / 2**20:>9.0f} {transferred / 2**20 / elapsed:>8.1f} "
+            f"{started_rss:>10.0f} {peak_rss:>10.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--mode", default="sync", choices=["sync", "async"])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--content-chars", type=int, default=10_000)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    args.database_url = scratch_database_url(args.database_url, "blog_transfer")
+
+    params = {"gzip": "true"} if args.gzip else {}
+    export_file = tempfile.NamedTemporaryFile(suffix=".ndjson.gz" if args.gzip else ".ndjson", delete=False)
+    export_file.close()
+
+    async def seeded_user(client: httpx.AsyncClient) -> dict:
+        user_id, headers = await _signup(client)
+        _seed(args.database_url, user_id, args.size_mb * 2**20 // args.content_chars, args.content_chars)
+        return headers
+
+    async def new_user(client: httpx.AsyncClient) -> dict:
+        return (await _signup(client))[1]
+
+    async def export(client: httpx.AsyncClient, headers: dict) -> int:
+        written = 0
+        with open(export_file.name, "wb") as output:
+            async with client.stream("GET", "/blogs/export", params=params, headers=headers) as response:
+                async for chunk in response.aiter_raw():
+                    written += output.write(chunk)
+        return written
+
+    async def import_(client: httpx.AsyncClient, headers: dict) -> int:
+        async def upload():
+            with open(export_file.name, "rb") as source:
+                while chunk := source.read(1 << 16):
+                    yield chunk
+
+        if args.gzip:
+            headers["Content-Type"] = "application/gzip"
+        response = await client.post("/blogs/import", content=upload(), headers=headers)
+        results = response.json()["results"]
+        print(f"imported {results['imported']} blogs, {results['failed']} failed")
+        return results["bytes_read"]
+
+    try:
+        rows = [await _phase(args, "export", seeded_user, export), await _phase(args, "import", new_user, import_)]
+    finally:
+        os.unlink(export_file.name)
+    print(f"{'phase':<7} {'MB moved':>9} {'MB/s':>8} {'start RSS':>10} {'peak RSS':>10}")
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
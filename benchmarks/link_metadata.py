@@ -0,0 +1,136 @@
+"""
+Link preview enrichment of one post with 100 links, against a local stub server: the links
+fetched one at a time, then concurrently (cold cache), then again from the warm cache. A share of
+the links answer 404 or stall past the timeout, so negative caching is exercised too.
+
+The stub listens on 127.0.0.1..127.0.0.N (one loopback address per "host") and serves pages
+with a small <head> followed by a large body, to show the download stopping at </head>.
+
+    python -m benchmarks.link_metadata --links 100 --hosts 10 --latency-ms 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import time
+
+
+def _stub_app(latency: float, body_bytes: int, stall: float):
+    filler = b"<p>" + b"lorem ipsum dolor sit amet " * 40 + b"</p>\n"
+
+    async def app(scope, receive, send):
+        path = scope["path"]
+        if path.startswith("/slow/"):
+            await asyncio.sleep(stall)
+        if not path.startswith("/page/"):
+            await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"not found"})
+            return
+        await asyncio.sleep(latency)
+        n = path.rsplit("/", 1)[1]
+        head = (f"<!doctype html><html><head><meta charset='utf-8'><title>Page {n}</title>"
+                f"<meta property='og:title' content='Stub page {n}'>"
+                f"<meta name='description' content='Description of stub page {n}.'>"
+                f"<meta property='og:image' content='/images/{n}.png'></head><body>\n").encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/html; charset=utf-8")]})
+        await send({"type": "http.response.body", "body": head, "more_body": True})
+        sent = 0
+        while sent < body_bytes:
+            await send({"type": "http.response.body", "body": filler * 16, "more_body": True})
+            sent += len(filler) * 16
+        await send({"type": "http.response.body", "body": b"</body></html>"})
+
+    return app
+
+
+def _post_links(args) -> list[str]:
+    rng = random.Random(args.seed)
+    links = []
+    for n in range(args.links):
+        host = f"127.0.0.{n % args.hosts + 1}:{args.port}"
+        roll = rng.random()
+        if roll < args.missing_share:
+            links.append(f"http://{host}/missing/{n}")
+        elif roll < args.missing_share + args.slow_share:
+            links.append(f"http://{host}/slow/{n}")
+        else:
+            links.append(f"http://{host}/page/{n}")
+    return links
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--hosts", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--body-kb", type=int, default=200, help="page size after </head>")
+    parser.add_argument("--missing-share", type=float, default=0.05)
+    parser.add_argument("--slow-share", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+
+    # app.scrape.metadata reads these at import time
+    os.environ["SCRAPE_ALLOW_PRIVATE_HOSTS"] = "true"
+    os.environ["SCRAPE_TIMEOUT_SECONDS"] = str(args.timeout)
+    os.environ["SCRAPE_MAX_URLS"] = str(max(args.links, 100))
+    import uvicorn
+
+    from app.llm.cache import InMemoryCacheBackend, ResponseCache
+    from app.scrape.metadata import LinkPreviewer, SCRAPE_MAX_BYTES, SCRAPE_MAX_CONCURRENCY, SCRAPE_MAX_PER_HOST, \
+        extract_urls
+
+    sockets = []
+    for host in range(1, args.hosts + 1):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((f"127.0.0.{host}", args.port))
+        sockets.append(sock)
+    app = _stub_app(args.latency_ms / 1000, args.body_kb * 1024, args.timeout * 3)
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=sockets))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    content = "A post citing its sources:\n" + "\n".join(f"- see {url}." for url in _post_links(args))
+    urls = extract_urls(content)
+
+    def previewer(concurrency: int, per_host: int) -> LinkPreviewer:
+        cache = ResponseCache(InMemoryCacheBackend(10_000, 32 * 1024 * 1024), 3600)
+        return LinkPreviewer(cache, concurrency, per_host, args.timeout, SCRAPE_MAX_BYTES)
+
+    async def timed(name: str, target: LinkPreviewer) -> str:
+        started = time.perf_counter()
+        results = await target.lookup_many(urls)
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if result["error"])
+        return (f"{name:<32} {elapsed * 1000:>9.0f} {len(results) - failed:>4} {failed:>6} "
+                f"{target.fetches:>8} {target.bytes_read / 1024:>9.0f}")
+
+    sequential = previewer(1, 1)
+    concurrent = previewer(SCRAPE_MAX_CONCURRENCY, SCRAPE_MAX_PER_HOST)
+    rows = []
+    try:
+        for target in (sequential, concurrent):
+            await target.start()
+        rows.append(await timed("one at a time", sequential))
+        rows.append(await timed(f"concurrent ({SCRAPE_MAX_CONCURRENCY}, {SCRAPE_MAX_PER_HOST}/host), cold", concurrent))
+        rows.append(await timed("concurrent, warm cache", concurrent))
+    finally:
+        for target in (sequential, concurrent):
+            await target.close()
+        server.should_exit = True
+        await serving
+
+    print(f"{len(urls)} links over {args.hosts} hosts, {args.latency_ms:.0f} ms per page, "
+          f"{args.body_kb} KB after </head>, timeout {args.timeout}s")
+    print(f"{'':<32} {'ms':>9} {'ok':>4} {'failed':>6} {'fetches':>8} {'KB read':>9}")
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
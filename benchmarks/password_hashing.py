@@ -0,0 +1,39 @@
+"""
+Logins per second (one bcrypt verify each) at several work factors, single-threaded and
+across the hashing pool.
+
+    python -m benchmarks.password_hashing --rounds 10 11 12 13 --logins 64
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+def _logins_per_second(context: CryptContext, hashed: str, logins: int, threads: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: context.verify("benchmark-password", hashed), range(logins)))
+    return logins / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6} {'1 thread/s':>11} {f'{args.threads} threads/s':>13} {'per core/s':>11}")
+    for rounds in args.rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash("benchmark-password")
+        single = _logins_per_second(context, hashed, max(4, args.logins // args.threads), 1)
+        pooled = _logins_per_second(context, hashed, args.logins, args.threads)
+        print(f"{rounds:>6} {single:>11.1f} {pooled:>13.1f} {pooled / args.threads:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
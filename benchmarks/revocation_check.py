@@ -0,0 +1,73 @@
+"""
+Access-token check latency with the revocation list in memory vs. a blacklist query per request.
+
+    SECRET_KEY=bench python -m benchmarks.revocation_check --rows 100000 --iterations 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.model import BlacklistedToken
+from app.database import Base, ThreadedSession
+from app.jwt_utils import create_access_token, verify_access_token
+from app.token_revocation import revocation_list
+from benchmarks.scratch_db import scratch_database_url
+
+
+async def _time(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]):
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<28} p50={statistics.median(samples):.3f}ms p99={p99:.3f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=5_000)
+    args = parser.parse_args()
+    args.database_url = scratch_database_url(args.database_url, "revocation")
+
+    engine = create_engine(args.database_url)
+    Base.metadata.drop_all(bind=engine, tables=[BlacklistedToken.__table__])
+    Base.metadata.create_all(bind=engine, tables=[BlacklistedToken.__table__])
+    db = sessionmaker(bind=engine)()
+
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    db.bulk_insert_mappings(BlacklistedToken, [
+        {"token_hash": f"{i:064x}", "expires_at": expires_at} for i in range(args.rows)
+    ])
+    db.commit()
+
+    token = create_access_token(1)
+
+    session = ThreadedSession(db)
+
+    revocation_list.ready = False
+    _report("database check", await _time(lambda: verify_access_token(token, session), args.iterations))
+
+    revocation_list.sync(db)
+    _report("in-memory revocation list", await _time(lambda: verify_access_token(token, session), args.iterations))
+
+    db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
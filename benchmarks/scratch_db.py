@@ -0,0 +1,13 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+
+def scratch_database_url(database_url: str | None, name: str) -> str:
+    """`database_url` when given, else a SQLite file in a temporary directory removed at exit."""
+    if database_url:
+        return database_url
+    directory = tempfile.mkdtemp(prefix=f"benchmark-{name}-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return f"sqlite:///{os.path.join(directory, name + '.db')}"
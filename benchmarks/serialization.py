@@ -0,0 +1,76 @@
+"""
+Time to build the response body for 1,000 blogs: the old jsonable_encoder path vs. the
+TypeAdapter envelope, encoded with orjson and with the stdlib fallback. No database involved.
+
+    python -m benchmarks.serialization --blogs 1000 --content-chars 2000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import utils
+from app.blog.model import Blog
+from app.blog.schema import BlogListPage, BlogResponse
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _old_response(results) -> bytes:
+    # get_response_schema before the TypeAdapter/orjson path
+    return JSONResponse(content={"message": "ok", "status": 200, "results": jsonable_encoder(results)}).body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blogs", type=int, default=1_000)
+    parser.add_argument("--content-chars", type=int, default=2_000)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    started = datetime(2024, 1, 1)
+    blogs = [
+        Blog(id=i, user_id=1, title=f"Post {i}", content="x" * args.content_chars, is_active=True,
+             created_at=started + timedelta(seconds=i), updated_at=started + timedelta(seconds=i))
+        for i in range(args.blogs)
+    ]
+    page = {
+        "items": [{"id": blog.id, "title": blog.title, "excerpt": blog.content[:200],
+                   "created_at": blog.created_at, "updated_at": blog.updated_at} for blog in blogs],
+        "next_cursor": None,
+    }
+    blogs_adapter = TypeAdapter(list[BlogResponse])
+    page_adapter = TypeAdapter(BlogListPage)
+
+    cases = [
+        ("ORM blogs", lambda: _old_response(blogs),
+         lambda: utils.get_response_schema(blogs, "ok", 200, adapter=blogs_adapter).body),
+        ("list page", lambda: _old_response(page),
+         lambda: utils.get_response_schema(page, "ok", 200, adapter=page_adapter).body),
+    ]
+    orjson = utils.orjson
+    print(f"{'payload':<10} {'encoder':<8} {'before ms':>10} {'after ms':>9} {'speedup':>8}   (per {args.blogs} blogs)")
+    for name, before, after in cases:
+        before_ms = _median_ms(before, args.iterations)
+        for encoder, module in (("orjson", orjson), ("stdlib", None)):
+            if encoder == "orjson" and orjson is None:
+                continue
+            utils.orjson = module
+            after_ms = _median_ms(after, args.iterations)
+            print(f"{name:<10} {encoder:<8} {before_ms:>10.2f} {after_ms:>9.2f} {before_ms / after_ms:>7.1f}x")
+    utils.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
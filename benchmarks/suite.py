@@ -0,0 +1,284 @@
+"""
+Load and latency suite: runs app.main:app in a uvicorn process against a local database and the
+fake LLM provider, drives scripted workloads and reports throughput and p50/p95/p99 per endpoint.
+
+Workloads:
+    login_storm       concurrent logins of the seeded users (bcrypt bound)
+    read_polling      blog list, detail and conditional (If-None-Match) detail polling
+    write_mix         creates and updates of the users' own blogs
+    suggestion_burst  topic suggestions over a small keyword vocabulary (cache hits and misses)
+
+Save a baseline, then compare later runs against it; the run exits non-zero when an endpoint
+regresses past --threshold:
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.2
+
+Use a throwaway database: the suite adds users and blogs. Without --database-url it runs on a
+temporary SQLite file that is deleted when the run ends.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+from benchmarks.db_modes import _wait_until_up
+from benchmarks.scratch_db import scratch_database_url
+
+WORKLOADS = ("login_storm", "read_polling", "write_mix", "suggestion_burst")
+KEYWORDS = ["python", "fastapi", "asyncio", "sqlalchemy", "postgres", "caching", "testing", "docker", "kubernetes",
+            "pydantic", "jwt", "oauth", "redis", "celery", "graphql", "rest", "websockets", "profiling",
+            "logging", "metrics", "tracing", "ci", "typing", "packaging", "llm", "embeddings", "search",
+            "pagination", "security", "deployment"]
+PASSWORD = "benchmark-password"
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latency samples and failures per endpoint label for one workload."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    async def call(self, label: str, send, expected=(200,)) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await send()
+        except httpx.HTTPError:
+            response = None
+        self.samples[label].append((time.perf_counter() - started) * 1000)
+        if response is None or response.status_code not in expected:
+            self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        results = {}
+        for label, samples in self.samples.items():
+            samples.sort()
+            results[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(_percentile(samples, 0.50), 2),
+                "p95_ms": round(_percentile(samples, 0.95), 2),
+                "p99_ms": round(_percentile(samples, 0.99), 2),
+            }
+        return results
+
+
+async def _drive(operations, concurrency: int) -> float:
+    """Runs the operation factories from `operations` on `concurrency` workers; returns elapsed seconds."""
+    remaining = iter(operations)
+
+    async def worker():
+        for operation in remaining:
+            await operation()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+class Suite:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.users: list[dict] = []
+
+    async def setup(self):
+        run = uuid.uuid4().hex[:8]
+        for i in range(self.args.users):
+            email = f"bench-{run}-{i}@example.com"
+            await self.client.post("/auth/signup", json={"email": email, "password": PASSWORD,
+                                                         "first_name": "Bench", "last_name": "Mark"})
+            results = (await self.client.post("/auth/login", json={"email": email, "password": PASSWORD})).json()["results"]
+            headers = {"Authorization": "Bearer " + results["access_token"]}
+            items = [{"title": f"Post {n}", "content": "lorem ipsum dolor " * 100} for n in range(self.args.blogs_per_user)]
+            created = (await self.client.post("/blogs/bulk", json={"items": items}, headers=headers)).json()["results"]
+            self.users.append({"email": email, "headers": headers, "blog_ids": [item["id"] for item in created["items"]],
+                               "etags": {}})
+
+    def login_storm(self, recorder: Recorder):
+        for _ in range(self.args.logins):
+            user = self.random.choice(self.users)
+            body = {"email": user["email"], "password": PASSWORD}
+            yield lambda body=body: recorder.call("POST /auth/login", lambda: self.client.post("/auth/login", json=body))
+
+    def read_polling(self, recorder: Recorder):
+        for _ in range(self.args.requests):
+            user = self.random.choice(self.users)
+            blog_id = self.random.choice(user["blog_ids"])
+            roll = self.random.random()
+            if roll < 0.4:
+                yield lambda user=user: recorder.call(
+                    "GET /blogs/blog-list", lambda: self.client.get("/blogs/blog-list", headers=user["headers"]))
+            elif roll < 0.8 or blog_id not in user["etags"]:
+                yield lambda user=user, blog_id=blog_id: self._get_detail(recorder, user, blog_id)
+            else:
+                headers = {**user["headers"], "If-None-Match": user["etags"][blog_id]}
+                yield lambda blog_id=blog_id, headers=headers: recorder.call(
+                    "GET /blogs/blog/{id} (conditional)",
+                    lambda: self.client.get(f"/blogs/blog/{blog_id}", headers=headers), expected=(200, 304))
+
+    async def _get_detail(self, recorder: Recorder, user: dict, blog_id: int):
+        response = await recorder.call(
+            "GET /blogs/blog/{id}", lambda: self.client.get(f"/blogs/blog/{blog_id}", headers=user["headers"]))
+        if response is not None and "etag" in response.headers:
+            user["etags"][blog_id] = response.headers["etag"]
+
+    def write_mix(self, recorder: Recorder):
+        for n in range(self.args.requests):
+            user = self.random.choice(self.users)
+            body = {"title": f"Benchmark {n}", "content": "lorem ipsum dolor " * 100}
+            if self.random.random() < 0.5:
+                yield lambda user=user, body=body: recorder.call(
+                    "POST /blogs/blog", lambda: self.client.post("/blogs/blog", json=body, headers=user["headers"]),
+                    expected=(201,))
+            else:
+                blog_id = self.random.choice(user["blog_ids"])
+                yield lambda user=user, body=body, blog_id=blog_id: recorder.call(
+                    "PUT /blogs/blog/{id}",
+                    lambda: self.client.put(f"/blogs/blog/{blog_id}", json=body, headers=user["headers"]))
+
+    def suggestion_burst(self, recorder: Recorder):
+        for _ in range(self.args.suggestions):
+            user = self.random.choice(self.users)
+            body = {"topics": self.random.sample(KEYWORDS[:self.args.keyword_vocabulary], 2)}
+            yield lambda user=user, body=body: recorder.call(
+                "POST /llm/suggest-topics",
+                lambda: self.client.post("/llm/suggest-topics", json=body, headers=user["headers"]))
+
+    async def run(self, workload: str) -> dict:
+        recorder = Recorder()
+        elapsed = await _drive(getattr(self, workload)(recorder), self.args.concurrency)
+        return recorder.summary(elapsed)
+
+
+def _server_env(args) -> dict:
+    env = {
+        **os.environ,
+        "DB_MODE": args.mode,
+        "DATABASE_URL": args.database_url,
+        "LLM_PROVIDER": "fake",
+        "MIGRATE_ON_STARTUP": "true",
+        "FAKE_LLM_SEED": str(args.seed),
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "SECRET_KEY": os.getenv("SECRET_KEY", "benchmark-secret"),
+        "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "true"),
+    }
+    # Measure the service, not the provider quota the scheduler enforces in production
+    env.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    env.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+    env.setdefault("MAX_CONTEXT_TOKENS", "8192")
+    return env
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Regressions of `results` against `baseline`: latency up or throughput down by more than `threshold`."""
+    regressions = []
+    for workload, endpoints in baseline["results"].items():
+        for label, before in endpoints.items():
+            after = results.get(workload, {}).get(label)
+            if after is None:
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                if after[key] > before[key] * (1 + threshold) and after[key] - before[key] > min_delta_ms:
+                    regressions.append(f"{workload} {label}: {key} {before[key]} -> {after[key]}")
+            if after["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{workload} {label}: throughput_rps {before['throughput_rps']} -> "
+                                   f"{after['throughput_rps']}")
+            if after["errors"] > before["errors"]:
+                regressions.append(f"{workload} {label}: errors {before['errors']} -> {after['errors']}")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--mode", default="sync", choices=["sync", "async"])
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=WORKLOADS)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--blogs-per-user", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2_000, help="per read/write workload")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--suggestions", type=int, default=500)
+    parser.add_argument("--keyword-vocabulary", type=int, default=12, help="smaller means more cache hits")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="write this run's results as JSON")
+    parser.add_argument("--save-baseline", help="write this run's results as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+    args.database_url = scratch_database_url(args.database_url, "suite")
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=_server_env(args),
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await _wait_until_up(client, process)
+            suite = Suite(client, args)
+            await suite.setup()
+            for workload in args.workloads:
+                results[workload] = await suite.run(workload)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"{'workload':<17} {'endpoint':<36} {'req':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for workload, endpoints in results.items():
+        for label, row in sorted(endpoints.items()):
+            print(f"{workload:<17} {label:<36} {row['requests']:>6} {row['errors']:>4} {row['throughput_rps']:>8.1f} "
+                  f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "save_baseline", "baseline", "threshold", "min_delta_ms", "port")},
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != report["config"]:
+            print("warning: baseline was recorded with different settings:", baseline.get("config"))
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))